@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+TOKEN_CACHE_KEY = 'auth-token:{}'
+
+
+def get_token_cache_key(key):
+    """Возвращает ключ кеша для токена."""
+    return TOKEN_CACHE_KEY.format(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Аутентификация по токену, кеширующая пару пользователь-токен
+    на короткое время, чтобы не обращаться к базе на каждый запрос.
+    """
+
+    def authenticate_credentials(self, key):
+        cache_key = get_token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            cache.set(cache_key, cached, settings.AUTH_TOKEN_CACHE_TIMEOUT)
+        user, token = cached
+        if not user.is_active:
+            raise AuthenticationFailed('User inactive or deleted.')
+        return user, token
@@ -0,0 +1,168 @@
+import io
+import os
+import zipfile
+from itertools import islice
+
+import orjson
+from django.core.files.storage import default_storage
+
+from core import constants
+from recipes.models import Favorite, Recipe, ShoppingCart, User
+
+from .projections import RecipeProjection
+from .snapshots import SNAPSHOT_FIELDS
+
+USER_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Несохраняющий буфер для zipfile.
+
+    Записанные архивом байты накапливаются до вызова pop(); перемотка
+    не поддерживается, поэтому zipfile пишет размеры файлов после
+    их содержимого.
+    """
+
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def pop(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+def chunked(iterable, size):
+    """Разбивает итерируемый объект на списки по size элементов."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def get_image_name(row):
+    """Возвращает путь изображения рецепта внутри архива."""
+    return f'images/{row["id"]}-{os.path.basename(row["image"])}'
+
+
+def get_recipe_documents(user):
+    """Отдаёт пачки представлений рецептов пользователя."""
+    projection = RecipeProjection(None, SNAPSHOT_FIELDS)
+    rows = Recipe.objects.filter(
+        author=user, is_active=True
+    ).order_by('id').values(
+        *RecipeProjection.get_values(SNAPSHOT_FIELDS)
+    ).iterator(chunk_size=constants.EXPORT_CHUNK_SIZE)
+    for chunk in chunked(rows, constants.EXPORT_CHUNK_SIZE):
+        documents = projection.represent(chunk)
+        for document, row in zip(documents, chunk):
+            document['image'] = get_image_name(row) if row['image'] else None
+        yield documents
+
+
+def get_owner_documents(model, user, *fields):
+    """Отдаёт пачки записей избранного или списка покупок."""
+    rows = model.objects.filter(
+        owner=user, recipe__is_active=True
+    ).order_by('id').values(
+        'recipe_id', 'recipe__name', *fields
+    ).iterator(chunk_size=constants.EXPORT_CHUNK_SIZE)
+    for chunk in chunked(rows, constants.EXPORT_CHUNK_SIZE):
+        yield [
+            {
+                'id': row.pop('recipe_id'),
+                'name': row.pop('recipe__name'),
+                **row
+            }
+            for row in chunk
+        ]
+
+
+def get_subscription_documents(user):
+    """Отдаёт пачки авторов, на которых подписан пользователь."""
+    rows = User.objects.filter(
+        subscribing__user=user, is_active=True
+    ).order_by('id').values(*USER_FIELDS).iterator(
+        chunk_size=constants.EXPORT_CHUNK_SIZE
+    )
+    yield from chunked(rows, constants.EXPORT_CHUNK_SIZE)
+
+
+def write_json_array(archive, buffer, name, batches):
+    """Пишет в архив JSON-массив пачками, отдавая готовые байты."""
+    with archive.open(name, 'w') as file:
+        separator = b'['
+        for batch in batches:
+            for document in batch:
+                file.write(separator)
+                file.write(orjson.dumps(document))
+                separator = b','
+            yield buffer.pop()
+        file.write(b'[]' if separator == b'[' else b']')
+    yield buffer.pop()
+
+
+def write_images(archive, buffer, user):
+    """
+    Копирует изображения рецептов из хранилища в архив блоками
+    EXPORT_FILE_CHUNK байт без сжатия.
+    """
+    rows = Recipe.objects.filter(
+        author=user, is_active=True
+    ).exclude(image='').order_by('id').values('id', 'image').iterator(
+        chunk_size=constants.EXPORT_CHUNK_SIZE
+    )
+    for row in rows:
+        try:
+            source = default_storage.open(row['image'], 'rb')
+        except OSError:
+            continue
+        info = zipfile.ZipInfo(get_image_name(row))
+        info.compress_type = zipfile.ZIP_STORED
+        with source, archive.open(info, 'w') as file:
+            while data := source.read(constants.EXPORT_FILE_CHUNK):
+                file.write(data)
+                yield buffer.pop()
+    yield buffer.pop()
+
+
+def stream_export(user):
+    """
+    Собирает ZIP-архив данных пользователя по мере отправки.
+
+    Запросы выполняются через .iterator() пачками по EXPORT_CHUNK_SIZE,
+    изображения читаются блоками, поэтому расход памяти не зависит
+    от числа рецептов. Скрытые до удаления рецепты и пользователи
+    в архив не попадают.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(
+        buffer, 'w', compression=zipfile.ZIP_DEFLATED
+    ) as archive:
+        archive.writestr('profile.json', orjson.dumps(
+            {field: getattr(user, field) for field in USER_FIELDS}
+        ))
+        yield buffer.pop()
+        yield from write_json_array(
+            archive, buffer, 'recipes.json', get_recipe_documents(user)
+        )
+        yield from write_json_array(
+            archive, buffer, 'favorites.json',
+            get_owner_documents(Favorite, user)
+        )
+        yield from write_json_array(
+            archive, buffer, 'shopping_cart.json',
+            get_owner_documents(ShoppingCart, user, 'servings')
+        )
+        yield from write_json_array(
+            archive, buffer, 'subscriptions.json',
+            get_subscription_documents(user)
+        )
+        yield from write_images(archive, buffer, user)
+    yield buffer.pop()
@@ -1,8 +1,11 @@
 from django_filters import FilterSet
-from django_filters.filters import CharFilter, ModelMultipleChoiceFilter
+from django_filters.filters import (CharFilter, ModelMultipleChoiceFilter,
+                                    NumberFilter)
 
 from recipes.models import Ingredient, Recipe, Tag
 
+from .utils import get_recipe_ids
+
 
 class RecipeModelFilter(FilterSet):
     """Фильтерсет рецептов."""
@@ -13,6 +16,8 @@ class RecipeModelFilter(FilterSet):
         to_field_name='slug',
         queryset=Tag.objects.all()
     )
+    calories_min = NumberFilter(field_name='calories', lookup_expr='gte')
+    calories_max = NumberFilter(field_name='calories', lookup_expr='lte')
 
     class Meta:
         model = Recipe
@@ -20,16 +25,18 @@ class RecipeModelFilter(FilterSet):
 
     def is_favorited_filter(self, queryset, name, value):
         """Фильтрует рецепты, находящиеся в избранном."""
-        user = self.request.user
-        if value and user.is_authenticated:
-            return queryset.filter(favorited__owner=user)
+        if value and self.request.user.is_authenticated:
+            return queryset.filter(
+                id__in=get_recipe_ids(self.request, 'favorited')
+            )
         return queryset
 
     def is_in_shopping_cart_filter(self, queryset, name, value):
         """Фильтрует рецепты, находящиеся в списке покупок."""
-        user = self.request.user
-        if value and user.is_authenticated:
-            return queryset.filter(shopping__owner=user)
+        if value and self.request.user.is_authenticated:
+            return queryset.filter(
+                id__in=get_recipe_ids(self.request, 'shopping')
+            )
         return queryset
 
 
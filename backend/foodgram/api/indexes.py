@@ -0,0 +1,46 @@
+from bisect import bisect_left
+
+from core.preload import register
+from recipes.models import Ingredient, Tag
+
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+
+
+class IngredientIndex:
+    """
+    Ингредиенты, отсортированные по названию без учёта регистра, для
+    поиска по началу названия двоичным поиском без запроса к базе.
+    """
+
+    def __init__(self, rows):
+        self.rows = tuple(sorted(
+            rows, key=lambda row: (row['name'].casefold(), row['id'])
+        ))
+        self.keys = tuple(row['name'].casefold() for row in self.rows)
+
+    def search(self, prefix):
+        """
+        Возвращает ингредиенты, название которых начинается с prefix
+        без учёта регистра, как name__istartswith, в порядке названий.
+        """
+        prefix = prefix.casefold()
+        start = end = bisect_left(self.keys, prefix)
+        while end < len(self.keys) and self.keys[end].startswith(prefix):
+            end += 1
+        return sorted(
+            self.rows[start:end], key=lambda row: (row['name'], row['id'])
+        )
+
+
+def load_tag_map():
+    return {tag['id']: tag for tag in Tag.objects.values(*TAG_FIELDS)}
+
+
+def load_ingredient_index():
+    return IngredientIndex(
+        Ingredient.objects.values('id', 'name', 'measurement_unit')
+    )
+
+
+tag_map = register('tags', load_tag_map)
+ingredient_index = register('ingredients', load_ingredient_index)
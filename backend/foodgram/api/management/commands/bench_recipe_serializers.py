@@ -0,0 +1,111 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.projections import RecipeProjection
+from api.renderers import ORJSONRenderer
+from api.serializers import RecipeSerializer
+from recipes.models import (Ingredient, Recipe, RecipeIngredient, RecipeTag,
+                            Tag, User)
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare recipe serializers and projection throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def seed(self, count):
+        """Создаёт временные рецепты для замера."""
+        author = User.objects.first()
+        tags = list(Tag.objects.all()[:3])
+        ingredients = list(Ingredient.objects.all()[:200])
+        if not (author and tags and ingredients):
+            raise ValueError('Seeding needs a user, tags and ingredients')
+        Recipe.objects.bulk_create(
+            Recipe(
+                author=author, name=f'Рецепт {index}', text='Текст',
+                image='recipes/bench.png', cooking_time=10
+            ) for index in range(count)
+        )
+        recipes = Recipe.objects.order_by('-id')[:count]
+        RecipeTag.objects.bulk_create(
+            RecipeTag(recipe=recipe, tag=tag)
+            for recipe in recipes for tag in tags
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for recipe in recipes
+            for ingredient in random.sample(
+                ingredients, min(8, len(ingredients))
+            )
+        )
+
+    def measure(self, name, func, count, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = func()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{name:<32} {count * repeat / elapsed:>12.0f} objects/sec'
+        )
+        return result
+
+    def benchmark(self, limit, repeat):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        queryset = Recipe.objects.all()[:limit]
+        count = len(queryset)
+        context = {'request': request}
+        serialized = self.measure(
+            'RecipeSerializer',
+            lambda: RecipeSerializer(
+                Recipe.objects.all()[:limit], many=True, context=context
+            ).data,
+            count, repeat
+        )
+        self.measure(
+            'RecipeSerializer + prefetch',
+            lambda: RecipeSerializer(
+                Recipe.objects.prefetch_related(
+                    'tags', 'amount_ingredient__ingredient'
+                ).select_related('author')[:limit],
+                many=True, context=context
+            ).data,
+            count, repeat
+        )
+        projected = self.measure(
+            'RecipeProjection',
+            lambda: RecipeProjection(request).represent(
+                Recipe.objects.values(*RecipeProjection.values)[:limit]
+            ),
+            count, repeat
+        )
+        self.measure(
+            'JSONRenderer',
+            lambda: JSONRenderer().render(serialized), count, repeat
+        )
+        self.measure(
+            'ORJSONRenderer',
+            lambda: ORJSONRenderer().render(projected), count, repeat
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    self.seed(options['seed'])
+                self.benchmark(options['limit'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,362 @@
+import http.client
+import json
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.authtoken.models import Token
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            RecipeTag, ShoppingCart, Tag, User)
+from users.models import Subscribe
+
+COLLECTION = (
+    settings.BASE_DIR.parent.parent
+    / 'postman-collection' / 'diploma.postman_collection.json'
+)
+
+BASELINE = COLLECTION.with_name('load_test_baseline.json')
+
+WEIGHTS = {
+    'recipes': 5,
+    'recipe_filters_for_favorite_and_shopping_cart': 2,
+    'ingredients': 2,
+    'users': 2,
+    'tags': 1,
+    'subscriptions': 1,
+    'shopping_cart': 1,
+    'favorite': 1,
+    'register_and_get_tokens': 0,
+    'delete_requests': 0,
+}
+
+ORDINALS = ('first', 'second', 'third', 'fourth', 'fifth')
+
+VARIABLE = re.compile(r'{{(\w+)}}')
+
+PATH_ID = re.compile(r'/({{\w+}}|\d+)(?=/)')
+
+
+class Command(BaseCommand):
+    help = 'Replay the Postman collection as a weighted load test'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=str(COLLECTION))
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=0)
+        parser.add_argument(
+            '--weight', action='append', default=[],
+            help='Folder weight, e.g. --weight recipes=10'
+        )
+        parser.add_argument('--writes', action='store_true')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--baseline', nargs='?', const=str(BASELINE),
+            help=f'Baseline JSON to compare with, by default {BASELINE.name}'
+        )
+        parser.add_argument('--save-baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2)
+
+    def load_collection(self, path):
+        """Возвращает переменные и плоский список запросов коллекции."""
+        with open(path, encoding='utf-8') as file:
+            collection = json.load(file)
+        variables = {
+            variable['key']: variable['value']
+            for variable in collection.get('variable', [])
+        }
+        requests = []
+
+        def walk(items, folder, auth):
+            for item in items:
+                item_auth = item.get('auth') or auth
+                if 'item' in item:
+                    walk(
+                        item['item'],
+                        folder or item['name'].split('//')[0].strip(),
+                        item_auth
+                    )
+                    continue
+                request = item['request']
+                requests.append({
+                    'folder': folder,
+                    'name': item['name'],
+                    'method': request['method'],
+                    'url': request['url']['raw'],
+                    'body': (request.get('body') or {}).get('raw'),
+                    'auth': request.get('auth') or item_auth,
+                })
+
+        walk(collection['item'], None, collection.get('auth'))
+        return variables, requests
+
+    def prepare(self, seed):
+        """
+        Создаёт пользователей, рецепты и списки, на которые ссылаются
+        переменные коллекции, и возвращает значения этих переменных.
+        """
+        users = []
+        for number in range(1, 4):
+            user, created = User.objects.get_or_create(
+                email=f'load-test-{number}@example.com',
+                defaults={
+                    'username': f'load-test-{number}',
+                    'first_name': 'Load',
+                    'last_name': f'Test {number}',
+                }
+            )
+            if created:
+                user.set_password('load-test-password')
+                user.save(update_fields=('password',))
+            users.append(user)
+        for number in range(Tag.objects.count(), 3):
+            Tag.objects.create(
+                name=f'Нагрузка {number}', slug=f'load-test-{number}',
+                color='#49B64E'
+            )
+        tags = list(Tag.objects.order_by('id')[:3])
+        ingredients = list(Ingredient.objects.order_by('id')[:2])
+        if len(ingredients) < 2:
+            raise CommandError('Load ingredients before running load_test')
+        author = users[1]
+        missing = len(ORDINALS) - author.recipes.count()
+        for index in range(max(missing, 0) + seed):
+            recipe = Recipe.objects.create(
+                author=author, name=f'Нагрузочный рецепт {index}',
+                text='Текст', image='recipes/load-test.png', cooking_time=10
+            )
+            RecipeTag.objects.bulk_create(
+                RecipeTag(recipe=recipe, tag=tag) for tag in tags[:2]
+            )
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe=recipe, ingredient=ingredient, amount=10
+                ) for ingredient in ingredients
+            )
+        recipes = list(author.recipes.order_by('id')[:len(ORDINALS)])
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create((
+                model(owner=users[0], recipe=recipe)
+                for recipe in recipes[:2]
+            ), ignore_conflicts=True)
+        Subscribe.objects.get_or_create(user=users[0], author=users[1])
+        values = {
+            'userToken': Token.objects.get_or_create(user=users[0])[0].key,
+            'secondUserToken': Token.objects.get_or_create(
+                user=users[1]
+            )[0].key,
+            'userId': users[0].id,
+            'secondUserId': users[1].id,
+            'thirdUserId': users[2].id,
+            'firstIndredientId': ingredients[0].id,
+            'secondIndredientId': ingredients[1].id,
+            'ingredientNameFirstLatter': ingredients[0].name[:1],
+        }
+        for ordinal, tag in zip(ORDINALS, tags):
+            values[f'{ordinal}TagId'] = tag.id
+            values[f'{ordinal}TagSlug'] = tag.slug
+        for ordinal, recipe in zip(ORDINALS, recipes):
+            values[f'{ordinal}RecipeId'] = recipe.id
+        return {key: str(value) for key, value in values.items()}
+
+    def build_scenarios(self, requests, variables, weights, writes):
+        """Подставляет переменные и назначает веса запросам."""
+        scenarios = []
+        for request in requests:
+            weight = weights.get(request['folder'], 1)
+            if not weight or (request['method'] != 'GET' and not writes):
+                continue
+            headers = {}
+            auth = request['auth'] or {}
+            if auth.get('type') == 'apikey':
+                params = {
+                    param['key']: param['value'] for param in auth['apikey']
+                }
+                headers[params['key']] = params['value']
+            if request['body']:
+                headers['Content-Type'] = 'application/json'
+            raw = json.dumps([request['url'], request['body'], headers])
+            unresolved = set(VARIABLE.findall(raw)) - set(variables)
+            if unresolved:
+                self.stderr.write(
+                    f'Skip {request["name"]}: {", ".join(unresolved)}'
+                )
+                continue
+            url, body, headers = json.loads(VARIABLE.sub(
+                lambda match: variables[match.group(1)].replace('"', '\\"'),
+                raw
+            ))
+            parts = urlsplit(url)
+            path = quote(
+                parts.path + (f'?{parts.query}' if parts.query else ''),
+                safe='/?&=%'
+            )
+            endpoint = PATH_ID.sub(
+                '/{id}', urlsplit(request['url'].replace(
+                    '{{baseUrl}}', ''
+                )).path
+            )
+            scenarios.append({
+                'endpoint': f'{request["method"]} {endpoint}',
+                'method': request['method'],
+                'path': path,
+                'body': body.encode() if body else None,
+                'headers': headers,
+                'weight': weight,
+            })
+        if not scenarios:
+            raise CommandError('No requests left to replay')
+        return scenarios
+
+    def run(self, scenarios, base_url, concurrency, total, duration):
+        """Выполняет запросы в пуле потоков и собирает задержки."""
+        parts = urlsplit(base_url)
+        connection_class = (
+            http.client.HTTPSConnection if parts.scheme == 'https'
+            else http.client.HTTPConnection
+        )
+        local = threading.local()
+        lock = threading.Lock()
+        latencies = defaultdict(list)
+        statuses = defaultdict(lambda: defaultdict(int))
+        weights = [scenario['weight'] for scenario in scenarios]
+        deadline = time.monotonic() + duration if duration else None
+        counter = iter(range(total)) if not duration else None
+
+        def request(scenario):
+            if not hasattr(local, 'connection'):
+                local.connection = connection_class(parts.netloc, timeout=60)
+            started = time.perf_counter()
+            try:
+                local.connection.request(
+                    scenario['method'], scenario['path'],
+                    body=scenario['body'], headers=scenario['headers']
+                )
+                response = local.connection.getresponse()
+                response.read()
+                status = str(response.status)
+            except (OSError, http.client.HTTPException) as error:
+                local.connection.close()
+                del local.connection
+                status = type(error).__name__
+            return time.perf_counter() - started, status
+
+        def worker():
+            while True:
+                if deadline is not None:
+                    if time.monotonic() >= deadline:
+                        return
+                else:
+                    with lock:
+                        if next(counter, None) is None:
+                            return
+                scenario = random.choices(scenarios, weights)[0]
+                elapsed, status = request(scenario)
+                with lock:
+                    latencies[scenario['endpoint']].append(elapsed)
+                    statuses[scenario['endpoint']][status] += 1
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [
+                executor.submit(worker) for _ in range(concurrency)
+            ]:
+                future.result()
+        return latencies, statuses, time.perf_counter() - started
+
+    def summarize(self, latencies, statuses, elapsed):
+        """Считает пропускную способность и перцентили по эндпоинтам."""
+        report = {}
+        for endpoint, values in sorted(latencies.items()):
+            p50, p95, p99 = np.percentile(values, (50, 95, 99)) * 1000
+            report[endpoint] = {
+                'requests': len(values),
+                'rps': round(len(values) / elapsed, 2),
+                'p50': round(float(p50), 2),
+                'p95': round(float(p95), 2),
+                'p99': round(float(p99), 2),
+                'statuses': dict(statuses[endpoint]),
+            }
+        return report
+
+    def print_report(self, report, elapsed):
+        total = sum(row['requests'] for row in report.values())
+        self.stdout.write(
+            f'{"endpoint":<48} {"count":>7} {"rps":>8} '
+            f'{"p50":>8} {"p95":>8} {"p99":>8}  statuses'
+        )
+        for endpoint, row in report.items():
+            statuses = ' '.join(
+                f'{status}:{count}'
+                for status, count in sorted(row['statuses'].items())
+            )
+            self.stdout.write(
+                f'{endpoint:<48} {row["requests"]:>7} {row["rps"]:>8.1f} '
+                f'{row["p50"]:>8.1f} {row["p95"]:>8.1f} {row["p99"]:>8.1f}'
+                f'  {statuses}'
+            )
+        self.stdout.write(
+            f'Total: {total} requests in {elapsed:.1f} s, '
+            f'{total / elapsed:.1f} req/s'
+        )
+
+    def compare(self, report, path, tolerance):
+        """Возвращает эндпоинты, ухудшившиеся относительно базовых."""
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        regressions = []
+        for endpoint, row in report.items():
+            base = baseline.get(endpoint)
+            if base is None:
+                continue
+            for metric in ('p95', 'p99'):
+                if row[metric] > base[metric] * (1 + tolerance):
+                    regressions.append(
+                        f'{endpoint} {metric}: '
+                        f'{base[metric]:.1f} -> {row[metric]:.1f} ms'
+                    )
+            if row['rps'] < base['rps'] * (1 - tolerance):
+                regressions.append(
+                    f'{endpoint} rps: {base["rps"]:.1f} -> {row["rps"]:.1f}'
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        weights = dict(WEIGHTS)
+        for weight in options['weight']:
+            folder, _, value = weight.partition('=')
+            weights[folder] = int(value)
+        variables, requests = self.load_collection(options['collection'])
+        variables.update(self.prepare(options['seed']))
+        variables['baseUrl'] = options['base_url'].rstrip('/')
+        scenarios = self.build_scenarios(
+            requests, variables, weights, options['writes']
+        )
+        latencies, statuses, elapsed = self.run(
+            scenarios, options['base_url'], options['concurrency'],
+            options['requests'], options['duration']
+        )
+        report = self.summarize(latencies, statuses, elapsed)
+        self.print_report(report, elapsed)
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            regressions = self.compare(
+                report, options['baseline'], options['tolerance']
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(
+                    f'{len(regressions)} regressions against baseline'
+                )
@@ -1,11 +1,28 @@
+from django.db import IntegrityError, transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
 
+from core.constants import BULK_RECIPES_MAX
 from recipes.models import (Ingredient, Favorite, Recipe, RecipeIngredient,
                             ShoppingCart, Tag, User)
+from recipes.nutrition import refresh_recipe_nutrition
 from users.models import Subscribe
 
+from .tasks import refresh_recipe
+from .utils import get_recipe_ids, get_subscribed_ids
+
+
+class FieldsMixin:
+    """Оставляет в сериализаторе только переданные в fields поля."""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор тегов."""
@@ -65,7 +82,7 @@ class RecipeShortSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', 'name', 'image', 'cooking_time')
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(FieldsMixin, serializers.ModelSerializer):
     """Сериализатор пользователей, использующийся для чтения."""
     is_subscribed = serializers.SerializerMethodField(read_only=True)
 
@@ -81,14 +98,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
         Получает значение поля is_subscribed, которое указывает,
         подписан ли пользователь на автора.
         """
-        request = self.context.get('request')
-        return bool(
-            request and request.user.is_authenticated
-            and Subscribe.objects.filter(
-                user=request.user,
-                author=obj
-            ).exists()
-        )
+        return obj.id in get_subscribed_ids(self.context.get('request'))
 
 
 class SubscribeSerializer(CustomUserSerializer):
@@ -107,7 +117,7 @@ class SubscribeSerializer(CustomUserSerializer):
         """Получает кверисет рецептов автора."""
         request = self.context.get('request')
         recipes_limit = request.GET.get('recipes_limit')
-        recipes = obj.recipes.all()
+        recipes = obj.recipes.filter(is_active=True)
         if recipes_limit:
             try:
                 recipes = recipes[:int(recipes_limit)]
@@ -120,28 +130,42 @@ class SubscribeSerializer(CustomUserSerializer):
 
     def get_recipes_count(self, obj):
         """Получает количество рецептов автора."""
-        return obj.recipes.count()
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return obj.recipes.filter(is_active=True).count()
 
 
 class SubscribeWriteSerializer(serializers.ModelSerializer):
+    user = serializers.HiddenField(default=serializers.CurrentUserDefault())
 
     class Meta:
         model = Subscribe
-        fields = ('user', 'author')
+        fields = ('user',)
 
     def validate(self, attrs):
-        author = attrs['author']
-        user = attrs['user']
-        if author == user:
+        if self.context.get('author') == attrs['user']:
             raise ValidationError(
                 'Нельзя подписаться на самого себя.'
             )
-        if Subscribe.objects.filter(author=author, user=user).exists():
-            raise ValidationError(
-                'Вы уже подписаны на этого пользователя.'
-            )
         return attrs
 
+    def create(self, validated_data):
+        """
+        Создаёт подписку одним INSERT, полагаясь на ограничение
+        уникальности вместо предварительной проверки.
+        """
+        try:
+            with transaction.atomic():
+                return Subscribe.objects.create(
+                    author=self.context.get('author'), **validated_data
+                )
+        except IntegrityError:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже подписаны на этого пользователя.'
+                ]
+            })
+
     def to_representation(self, instance):
         return SubscribeSerializer(
             instance.author,
@@ -149,7 +173,7 @@ class SubscribeWriteSerializer(serializers.ModelSerializer):
         ).data
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(FieldsMixin, serializers.ModelSerializer):
     """Сериализатор рецептов, использующийся для чтения."""
     is_favorited = serializers.SerializerMethodField()
     tags = TagSerializer(read_only=True, many=True)
@@ -165,7 +189,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         fields = (
             'id', 'tags', 'author', 'ingredients',
             'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time'
+            'name', 'image', 'text', 'cooking_time',
+            'calories', 'proteins', 'fats', 'carbohydrates'
         )
 
     def get_is_favorited(self, obj):
@@ -173,12 +198,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         Получает значение поля is_favorited, указывающего,
         находится ли рецепт в избранном.
         """
-        request = self.context.get('request')
-        return bool(
-            request and request.user.is_authenticated
-            and request.user.favorited.filter(
-                recipe=obj
-            ).exists()
+        return obj.id in get_recipe_ids(
+            self.context.get('request'), 'favorited'
         )
 
     def get_is_in_shopping_cart(self, obj):
@@ -186,12 +207,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         Получает значение поля is_in_shopping_cart, указывающего,
         находится ли рецепт в списке покупок.
         """
-        request = self.context.get('request')
-        return bool(
-            request and request.user.is_authenticated
-            and request.user.shopping.filter(
-                recipe=obj
-            ).exists()
+        return obj.id in get_recipe_ids(
+            self.context.get('request'), 'shopping'
         )
 
 
@@ -249,17 +266,33 @@ class PostRecipeSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.create_recipeingredient(recipe=recipe, ingredients=ingredients)
+        refresh_recipe_nutrition(recipe)
+        refresh_recipe.delay(recipe.id)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        """Обновляет объект рецепта."""
+        """
+        Обновляет объект рецепта. Теги и ингредиенты заменяются
+        запросами без сигналов на каждую строку, поэтому изменение
+        рецепта записывается в шину одним событием его сохранения,
+        которое применяется после фиксации транзакции.
+        """
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
+        previous = set(instance.amount_ingredient.values_list(
+            'ingredient_id', 'amount'
+        ))
         instance = super().update(instance, validated_data)
         instance.tags.clear()
         instance.tags.set(tags)
         instance.ingredients.clear()
         self.create_recipeingredient(recipe=instance, ingredients=ingredients)
+        if previous != {
+            (item['ingredient'].id, item['amount']) for item in ingredients
+        }:
+            refresh_recipe_nutrition(instance)
+        refresh_recipe.delay(instance.id)
         return instance
 
     def to_representation(self, instance):
@@ -275,17 +308,30 @@ class BaseFavoriteShoppingSerializer(serializers.ModelSerializer):
     Базовый сериализатор для создания записей избранного и списка покупок.
     """
 
+    owner = serializers.HiddenField(default=serializers.CurrentUserDefault())
+
     class Meta:
         abstract = True
         fields = ('recipe', 'owner')
         model = None
+        extra_kwargs = {
+            'recipe': {'queryset': Recipe.objects.filter(is_active=True)}
+        }
 
-    def validate(self, attrs):
-        recipe = attrs['recipe']
-        owner = attrs['owner']
-        if self.Meta.model.objects.filter(recipe=recipe, owner=owner).exists():
-            raise ValidationError('Этот рецепт уже есть в списке.')
-        return attrs
+    def create(self, validated_data):
+        """
+        Создаёт запись одним INSERT, полагаясь на ограничение
+        уникальности вместо предварительной проверки.
+        """
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Этот рецепт уже есть в списке.'
+                ]
+            })
 
     def to_representation(self, instance):
         return RecipeShortSerializer(
@@ -306,3 +352,17 @@ class ShoppingSerializer(BaseFavoriteShoppingSerializer):
 
     class Meta(BaseFavoriteShoppingSerializer.Meta):
         model = ShoppingCart
+        fields = BaseFavoriteShoppingSerializer.Meta.fields + ('servings',)
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Сериализатор списка id рецептов для пакетных операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RECIPES_MAX
+    )
+
+    def validate_recipes(self, value):
+        """Убирает повторяющиеся id, сохраняя порядок."""
+        return list(dict.fromkeys(value))
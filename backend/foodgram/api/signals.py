@@ -0,0 +1,137 @@
+from django.core.cache import cache
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from core.cache import bump_version
+from core.deletion import deactivated
+from core.events import bus
+
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            RecipeSnapshot, ShoppingCart, Tag, User)
+from recipes.shopping import bump_cart_version
+
+from .authentication import get_token_cache_key
+from .indexes import ingredient_index, tag_map
+
+
+def invalidate_token(event):
+    """Удаляет токен из кеша при выходе пользователя."""
+    cache.delete(get_token_cache_key(event.object_id))
+
+
+def invalidate_user_tokens(event):
+    """Удаляет из кеша токены пользователя при его изменении."""
+    cache.delete_many([
+        get_token_cache_key(key) for key in Token.objects.filter(
+            user_id=event.object_id
+        ).values_list('key', flat=True)
+    ])
+
+
+bus.subscribe('authtoken.token', invalidate_token)
+bus.subscribe('users.customuser', invalidate_user_tokens)
+
+
+def invalidation_handler(*namespaces):
+    """Создаёт обработчик, помечающий устаревшими кеши ответов API."""
+    def handler(event):
+        for namespace in namespaces:
+            bump_version(namespace)
+    return handler
+
+
+bus.subscribe('recipes.tag', invalidation_handler('tags', 'recipes'))
+bus.subscribe('recipes.tag', tag_map.reset)
+bus.subscribe(
+    'recipes.ingredient', invalidation_handler('ingredients', 'recipes')
+)
+bus.subscribe('recipes.ingredient', ingredient_index.reset)
+for model in ('recipes.recipe', 'recipes.nutrient', 'users.customuser'):
+    bus.subscribe(model, invalidation_handler('recipes'))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+def mark_recipe_snapshot_stale(sender, instance, **kwargs):
+    """Помечает устаревшим снимок изменённого рецепта."""
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    RecipeSnapshot.objects.filter(recipe_id=recipe_id).update(stale=True)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def mark_m2m_snapshot_stale(sender, instance, action, **kwargs):
+    """Помечает устаревшим снимок рецепта при изменении его связей."""
+    if action.startswith('post_') and isinstance(instance, Recipe):
+        RecipeSnapshot.objects.filter(
+            recipe_id=instance.pk
+        ).update(stale=True)
+
+
+@receiver(post_save, sender=Tag)
+def mark_tag_snapshots_stale(sender, instance, **kwargs):
+    """Помечает устаревшими снимки рецептов с изменённым тегом."""
+    RecipeSnapshot.objects.filter(
+        recipe__tags=instance
+    ).update(stale=True)
+
+
+@receiver(post_save, sender=Ingredient)
+def mark_ingredient_snapshots_stale(sender, instance, **kwargs):
+    """Помечает устаревшими снимки рецептов с изменённым ингредиентом."""
+    RecipeSnapshot.objects.filter(
+        recipe__ingredients=instance
+    ).update(stale=True)
+
+
+@receiver(post_save, sender=User)
+def mark_author_snapshots_stale(sender, instance, update_fields, **kwargs):
+    """Помечает устаревшими снимки рецептов изменённого автора."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    RecipeSnapshot.objects.filter(
+        recipe__author=instance
+    ).update(stale=True)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+def bump_recipe_cart_versions(sender, instance, created=False, **kwargs):
+    """Меняет версию списков покупок с изменённым рецептом."""
+    if sender is Recipe and created:
+        return
+    recipe_id = instance.pk if sender is Recipe else instance.recipe_id
+    bump_cart_version(shopping__recipe_id=recipe_id)
+
+
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_m2m_cart_versions(sender, instance, action, **kwargs):
+    """Меняет версию списков покупок при изменении состава рецепта."""
+    if action.startswith('post_') and isinstance(instance, Recipe):
+        bump_cart_version(shopping__recipe=instance)
+
+
+@receiver(post_save, sender=Ingredient)
+def bump_ingredient_cart_versions(sender, instance, **kwargs):
+    """Меняет версию списков покупок с изменённым ингредиентом."""
+    bump_cart_version(shopping__recipe__ingredients=instance)
+
+
+@receiver(post_save, sender=User)
+def bump_owner_cart_version(sender, instance, created, update_fields,
+                            **kwargs):
+    """Меняет версию списка покупок при смене имени владельца."""
+    if created or update_fields and not {
+        'first_name', 'last_name'
+    } & set(update_fields):
+        return
+    bump_cart_version(pk=instance.pk)
+
+
+@receiver(deactivated, sender=Recipe)
+def bump_deactivated_cart_versions(sender, queryset, **kwargs):
+    """Меняет версию списков покупок со скрытыми рецептами."""
+    bump_cart_version(pk__in=ShoppingCart.objects.filter(
+        recipe__in=queryset
+    ).values('owner_id'))
@@ -0,0 +1,103 @@
+from django.db import router, transaction
+from django.utils import timezone
+
+from recipes.models import Recipe, RecipeSnapshot
+
+from .indexes import TAG_FIELDS
+from .projections import AUTHOR_FIELDS, INGREDIENT_FIELDS, RecipeProjection
+from .utils import get_recipe_ids, get_subscribed_ids
+
+VIEWER_FIELDS = ('is_favorited', 'is_in_shopping_cart')
+SNAPSHOT_FIELDS = tuple(
+    name for name in RecipeProjection.fields if name not in VIEWER_FIELDS
+)
+
+
+def refresh_snapshots(recipe_ids):
+    """
+    Пересобирает снимки рецептов и увеличивает их версию.
+
+    Рецепты читаются из основной базы: реплика может отставать,
+    и снимок с новой версией сохранил бы старые данные.
+    Возвращает словарь снимков по id рецепта.
+    """
+    using = router.db_for_write(Recipe)
+    documents = RecipeProjection(None, SNAPSHOT_FIELDS, using).represent(
+        Recipe.objects.using(using).filter(
+            id__in=recipe_ids, is_active=True
+        ).values(*RecipeProjection.get_values(SNAPSHOT_FIELDS))
+    )
+    now = timezone.now()
+    with transaction.atomic():
+        snapshots = RecipeSnapshot.objects.select_for_update().in_bulk(
+            [document['id'] for document in documents]
+        )
+        created = []
+        for document in documents:
+            snapshot = snapshots.get(document['id'])
+            if snapshot is None:
+                snapshot = RecipeSnapshot(
+                    recipe_id=document['id'], document=document
+                )
+                snapshots[document['id']] = snapshot
+                created.append(snapshot)
+                continue
+            snapshot.document = document
+            snapshot.version += 1
+            snapshot.stale = False
+            snapshot.updated = now
+        RecipeSnapshot.objects.bulk_update(
+            [snapshot for snapshot in snapshots.values()
+             if snapshot not in created],
+            ('document', 'version', 'stale', 'updated')
+        )
+        RecipeSnapshot.objects.bulk_create(created, ignore_conflicts=True)
+    return snapshots
+
+
+def get_snapshot(recipe_id):
+    """Возвращает актуальный снимок рецепта, собирая его при отсутствии."""
+    snapshot = RecipeSnapshot.objects.filter(
+        recipe_id=recipe_id, stale=False
+    ).first()
+    if snapshot is None:
+        snapshot = refresh_snapshots([recipe_id]).get(int(recipe_id))
+    return snapshot
+
+
+def represent_snapshot(snapshot, request, fields):
+    """
+    Дополняет снимок полями, зависящими от пользователя,
+    и восстанавливает порядок ключей ответа.
+    """
+    document = snapshot.document
+    getters = {
+        'tags': lambda: [
+            {key: tag[key] for key in TAG_FIELDS}
+            for tag in document['tags']
+        ],
+        'author': lambda: {
+            **{key: document['author'][key] for key in AUTHOR_FIELDS},
+            'is_subscribed': (
+                document['author']['id'] in get_subscribed_ids(request)
+            ),
+        },
+        'ingredients': lambda: [
+            {key: ingredient[key] for key in INGREDIENT_FIELDS}
+            for ingredient in document['ingredients']
+        ],
+        'is_favorited': lambda: (
+            document['id'] in get_recipe_ids(request, 'favorited')
+        ),
+        'is_in_shopping_cart': lambda: (
+            document['id'] in get_recipe_ids(request, 'shopping')
+        ),
+        'image': lambda: (
+            request.build_absolute_uri(document['image'])
+            if document['image'] else None
+        ),
+    }
+    return {
+        name: getters[name]() if name in getters else document[name]
+        for name in fields
+    }
@@ -0,0 +1,15 @@
+from core.tasks import task
+from recipes.models import Recipe
+from recipes.similarity import refresh_similar_recipes
+
+from .snapshots import refresh_snapshots
+
+
+@task
+def refresh_recipe(recipe_id):
+    """Пересчитывает похожие рецепты и снимок рецепта."""
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None:
+        return
+    refresh_similar_recipes(recipe)
+    refresh_snapshots([recipe_id])
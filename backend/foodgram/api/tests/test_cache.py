@@ -0,0 +1,36 @@
+import threading
+import time
+
+from django.core.cache import cache
+from django.test import SimpleTestCase
+
+from core.cache import get_or_compute
+
+
+class SingleFlightTest(SimpleTestCase):
+    """Одновременный промах кеша пересчитывает значение один раз."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_two_threads_compute_once(self):
+        barrier = threading.Barrier(2)
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(threading.get_ident())
+            time.sleep(0.2)
+            return 'value'
+
+        def fetch():
+            barrier.wait()
+            results.append(get_or_compute('test', 'key', compute))
+
+        threads = [threading.Thread(target=fetch) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value', 'value'])
@@ -0,0 +1,108 @@
+import threading
+from collections import Counter
+
+from django.db import connections
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, Tag, User)
+from users.models import Subscribe
+
+THREADS = 16
+
+
+class ConcurrentWritesTest(TransactionTestCase):
+    """Одновременные запросы к избранному, списку покупок и подпискам."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.token = Token.objects.create(user=self.user).key
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='Рецепт', text='Текст',
+            image='recipes/images/test.png', cooking_time=10
+        )
+        self.recipe.tags.add(
+            Tag.objects.create(name='Тег', slug='tag', color='#FFFFFF')
+        )
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, amount=100,
+            ingredient=Ingredient.objects.create(
+                name='Мука', measurement_unit='г'
+            )
+        )
+
+    def hammer(self, method, url):
+        """Отправляет THREADS одинаковых запросов одновременно."""
+        barrier = threading.Barrier(THREADS)
+        statuses = []
+        lock = threading.Lock()
+
+        def send():
+            client = APIClient(raise_request_exception=False)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {self.token}')
+            try:
+                barrier.wait()
+                response = getattr(client, method)(url, format='json')
+                with lock:
+                    statuses.append(response.status_code)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=send) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return Counter(statuses)
+
+    def assert_one_succeeded(self, statuses, success):
+        self.assertEqual(
+            statuses[status.HTTP_500_INTERNAL_SERVER_ERROR], 0, statuses
+        )
+        self.assertEqual(statuses[success], 1, statuses)
+        self.assertEqual(
+            statuses[status.HTTP_400_BAD_REQUEST], THREADS - 1, statuses
+        )
+
+    def test_favorite(self):
+        url = f'/api/recipes/{self.recipe.id}/favorite/'
+        self.assert_one_succeeded(
+            self.hammer('post', url), status.HTTP_201_CREATED
+        )
+        self.assertEqual(Favorite.objects.count(), 1)
+        self.assert_one_succeeded(
+            self.hammer('delete', url), status.HTTP_204_NO_CONTENT
+        )
+        self.assertFalse(Favorite.objects.exists())
+
+    def test_shopping_cart(self):
+        url = f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        self.assert_one_succeeded(
+            self.hammer('post', url), status.HTTP_201_CREATED
+        )
+        self.assertEqual(ShoppingCart.objects.count(), 1)
+        self.assert_one_succeeded(
+            self.hammer('delete', url), status.HTTP_204_NO_CONTENT
+        )
+        self.assertFalse(ShoppingCart.objects.exists())
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        self.assert_one_succeeded(
+            self.hammer('post', url), status.HTTP_201_CREATED
+        )
+        self.assertEqual(Subscribe.objects.count(), 1)
+        self.assert_one_succeeded(
+            self.hammer('delete', url), status.HTTP_204_NO_CONTENT
+        )
+        self.assertFalse(Subscribe.objects.exists())
@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.deletion import schedule_deletion
+from recipes.models import (Ingredient, Recipe, RecipeIngredient,
+                            ShoppingCart, User)
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    MEDIA_ROOT=MEDIA_ROOT, TASKS_EAGER=True, SHOPPING_LIST_ACCEL=False
+)
+class DeferredDeletionTest(TestCase):
+    """Удаление автора и его рецептов из списков покупок других."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        ingredients = (
+            Ingredient.objects.create(name='мука', measurement_unit='г'),
+            Ingredient.objects.create(name='соль', measurement_unit='г'),
+        )
+        for author, ingredient, amount in (
+            (self.author, ingredients[0], 500),
+            (self.user, ingredients[1], 5),
+        ):
+            recipe = Recipe.objects.create(
+                author=author, name='Рецепт', text='Текст',
+                image='recipes/images/test.png', cooking_time=10
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+            ShoppingCart.objects.create(owner=self.user, recipe=recipe)
+
+    def download(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_deleted_author_leaves_shopping_lists(self):
+        self.assertIn('мука  (г) 500', self.download())
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule_deletion(self.author)
+        self.assertFalse(User.objects.filter(id=self.author.id).exists())
+        shopping_list = self.download()
+        self.assertNotIn('мука', shopping_list)
+        self.assertIn('соль  (г) 5', shopping_list)
@@ -0,0 +1,43 @@
+import io
+import json
+import zipfile
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingCart, User
+
+
+class ExportTest(TestCase):
+    """Выгрузка данных пользователя без скрытых рецептов."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        for name, is_active in (('Активный', True), ('Скрытый', False)):
+            recipe = Recipe.objects.create(
+                author=self.user, name=name, text='Текст', image='',
+                cooking_time=10, is_active=is_active
+            )
+            Favorite.objects.create(owner=self.user, recipe=recipe)
+            ShoppingCart.objects.create(owner=self.user, recipe=recipe)
+
+    def test_inactive_recipes_are_skipped(self):
+        response = self.client.get(f'/api/users/{self.user.id}/export/')
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        for name in ('recipes.json', 'favorites.json', 'shopping_cart.json'):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    [row['name'] for row in json.loads(archive.read(name))],
+                    ['Активный']
+                )
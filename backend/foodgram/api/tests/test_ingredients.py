@@ -0,0 +1,27 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.indexes import ingredient_index
+from recipes.models import Ingredient
+
+
+class IngredientSearchTest(TestCase):
+    """Поиск ингредиентов по началу названия."""
+
+    def setUp(self):
+        for name in ('мука', 'Мускат', 'молоко', 'соль'):
+            Ingredient.objects.create(name=name, measurement_unit='г')
+        ingredient_index.reset()
+        cache.clear()
+        self.client = APIClient()
+
+    def search(self, name):
+        response = self.client.get('/api/ingredients/', {'name': name})
+        self.assertEqual(response.status_code, 200)
+        return [ingredient['name'] for ingredient in response.json()]
+
+    def test_case_insensitive(self):
+        self.assertEqual(self.search('Му'), ['Мускат', 'мука'])
+        self.assertEqual(self.search('Мука'), ['мука'])
+        self.assertEqual(self.search('МОЛ'), ['молоко'])
@@ -0,0 +1,18 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+
+class RecipeLookupTest(TestCase):
+    """Нечисловой id рецепта в адресе."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_retrieve_non_numeric_id(self):
+        response = self.client.get('/api/recipes/abc/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_similar_non_numeric_id(self):
+        response = self.client.get('/api/recipes/abc/similar/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,84 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core.middleware import PIN_COOKIE, ReplicaMiddleware
+from core.routers import ReplicaPool, ReplicaRouter, read_from_replica
+
+AUTHORIZATION = 'Token 0123456789abcdef'
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(SimpleTestCase):
+    """Выбор базы для чтения и записи."""
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def route(self, replica):
+        token = read_from_replica.set(replica)
+        try:
+            return self.router.db_for_read(None)
+        finally:
+            read_from_replica.reset(token)
+
+    def test_read(self):
+        with mock.patch.object(ReplicaPool, 'is_healthy', return_value=True):
+            self.assertEqual(self.route(True), 'replica')
+            self.assertEqual(self.route(False), 'default')
+
+    def test_replica_down(self):
+        with mock.patch.object(ReplicaPool, 'is_healthy', return_value=False):
+            self.assertEqual(self.route(True), 'default')
+
+    def test_write(self):
+        token = read_from_replica.set(True)
+        try:
+            self.assertEqual(self.router.db_for_write(None), 'default')
+        finally:
+            read_from_replica.reset(token)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaMiddlewareTest(SimpleTestCase):
+    """Чтение с реплик и закрепление клиента за основной базой."""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.status = 200
+        self.middleware = ReplicaMiddleware(self.view)
+
+    def view(self, request):
+        self.replica = read_from_replica.get()
+        return HttpResponse(status=self.status)
+
+    def get(self, path='/api/recipes/', **extra):
+        self.middleware(self.factory.get(path, **extra))
+        return self.replica
+
+    def post(self, **extra):
+        return self.middleware(self.factory.post('/api/recipes/', **extra))
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertTrue(self.get())
+        self.assertFalse(self.get('/admin/'))
+
+    def test_pinned_by_cookie(self):
+        response = self.post()
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.factory.cookies[PIN_COOKIE] = response.cookies[PIN_COOKIE].value
+        self.assertFalse(self.get())
+
+    def test_pinned_by_token(self):
+        self.post(HTTP_AUTHORIZATION=AUTHORIZATION)
+        self.assertFalse(self.get(HTTP_AUTHORIZATION=AUTHORIZATION))
+        self.assertTrue(self.get(HTTP_AUTHORIZATION='Token other'))
+
+    def test_failed_write_does_not_pin(self):
+        self.status = 400
+        response = self.post(HTTP_AUTHORIZATION=AUTHORIZATION)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertTrue(self.get(HTTP_AUTHORIZATION=AUTHORIZATION))
@@ -0,0 +1,76 @@
+import shutil
+import tempfile
+
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (Ingredient, Nutrient, Recipe, RecipeIngredient,
+                            ShoppingCart, User)
+from recipes.tasks import refresh_nutrients
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, SHOPPING_LIST_ACCEL=False)
+class ShoppingListFileTest(TestCase):
+    """Файл списка покупок обновляется при любом изменении списка."""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user)}'
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.user, name='Рецепт', text='Текст',
+            image='recipes/images/test.png', cooking_time=10
+        )
+        self.ingredient = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        RecipeIngredient.objects.create(
+            recipe=self.recipe, ingredient=self.ingredient, amount=100
+        )
+        ShoppingCart.objects.create(owner=self.user, recipe=self.recipe)
+
+    def download(self):
+        response = self.client.get('/api/recipes/download_shopping_cart/')
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_file_is_reused(self):
+        self.assertIn('мука  (г) 100', self.download())
+        with self.assertNumQueries(2):
+            self.assertIn('мука  (г) 100', self.download())
+
+    def test_changes_without_version_bump(self):
+        self.assertIn('мука  (г) 100', self.download())
+        ShoppingCart.objects.filter(owner=self.user).update(servings=3)
+        self.assertIn('мука  (г) 300', self.download())
+        Recipe.objects.filter(id=self.recipe.id).update(is_active=False)
+        self.assertNotIn('мука', self.download())
+
+    def test_total_without_nutrient_data(self):
+        self.assertNotIn('Итого', self.download())
+        response = self.client.get(f'/api/recipes/{self.recipe.id}/')
+        self.assertIsNone(response.json()['calories'])
+
+    @override_settings(TASKS_EAGER=True)
+    def test_total_after_nutrient_change(self):
+        self.assertNotIn('Итого', self.download())
+        Nutrient.objects.create(
+            ingredient=self.ingredient,
+            calories=340, proteins=10, fats=1, carbohydrates=70
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            refresh_nutrients.delay([self.ingredient.id])
+        self.assertIn('Итого: 340 ккал', self.download())
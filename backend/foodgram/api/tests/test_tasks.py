@@ -0,0 +1,37 @@
+import threading
+import time
+
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+
+from core.models import Task
+from core.tasks import claim, requeue_stale, run, task
+
+
+@task
+def sleep(seconds):
+    time.sleep(seconds)
+
+
+@override_settings(TASKS_EAGER=False, TASK_LOCK_TIMEOUT=1)
+class TaskLeaseTest(TransactionTestCase):
+    """Долгая задача живого воркера не возвращается в очередь."""
+
+    def test_long_task_is_not_requeued(self):
+        sleep.delay(2)
+        task_obj, = claim('worker', 1)
+
+        def work():
+            try:
+                run(task_obj)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=work)
+        thread.start()
+        time.sleep(1.5)
+        self.assertEqual(requeue_stale(), 0)
+        thread.join()
+        self.assertEqual(
+            Task.objects.get(id=task_obj.id).status, Task.DONE
+        )
@@ -0,0 +1,49 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from api.views import RecipeViewSet
+from core.db import get_timeout
+from recipes.models import User
+
+TIMEOUTS = {'default': 5000, 'list': 2000, 'download_shopping_cart': 30000}
+
+
+class StatementTimeoutTest(TestCase):
+    """Лимит времени запросов к базе по действию вьюсета."""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='password-1'
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=user)}'
+        )
+
+    def get_timeout_in(self, action, url):
+        timeouts = []
+
+        def view(viewset, request, *args, **kwargs):
+            timeouts.append(get_timeout())
+            return Response()
+
+        with self.settings(STATEMENT_TIMEOUTS=TIMEOUTS):
+            with mock.patch.object(RecipeViewSet, action, view):
+                self.assertEqual(self.client.get(url).status_code, 200)
+        return timeouts[0]
+
+    def test_list(self):
+        self.assertEqual(self.get_timeout_in('list', '/api/recipes/'), 2000)
+
+    def test_export(self):
+        self.assertEqual(self.get_timeout_in(
+            'download_shopping_cart', '/api/recipes/download_shopping_cart/'
+        ), 30000)
+
+    def test_outside_request(self):
+        self.assertEqual(get_timeout(), 0)
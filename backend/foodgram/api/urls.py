@@ -1,8 +1,8 @@
 from django.urls import include, path
 from rest_framework import routers
 
-from .views import (CustomUserViewSet, IngredientViewSet, RecipeViewSet,
-                    TagViewSet)
+from .views import (CustomUserViewSet, IngredientViewSet, MetricsView,
+                    RecipeViewSet, TagViewSet)
 
 router = routers.DefaultRouter()
 router.register(
@@ -12,6 +12,7 @@ router.register('tags', viewset=TagViewSet, basename='tags')
 router.register('recipes', viewset=RecipeViewSet, basename='recipes')
 router.register('users', viewset=CustomUserViewSet, basename='users')
 urlpatterns = [
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken'))
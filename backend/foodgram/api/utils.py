@@ -0,0 +1,65 @@
+from rest_framework.exceptions import ValidationError
+
+
+def get_recipe_ids(request, related_name):
+    """
+    Возвращает множество id рецептов из избранного ('favorited')
+    или списка покупок ('shopping') пользователя.
+
+    Множество загружается одним запросом и запоминается на время
+    запроса, чтобы сериализаторы и фильтры не обращались к базе
+    для каждого рецепта.
+    """
+    if not (request and request.user.is_authenticated):
+        return frozenset()
+    recipe_ids = request.__dict__.setdefault('_recipe_ids', {})
+    if related_name not in recipe_ids:
+        recipe_ids[related_name] = frozenset(
+            getattr(request.user, related_name).values_list(
+                'recipe_id', flat=True
+            )
+        )
+    return recipe_ids[related_name]
+
+
+def get_subscribed_ids(request):
+    """
+    Возвращает множество id авторов, на которых подписан пользователь.
+
+    Множество загружается одним запросом и запоминается на время
+    запроса, чтобы поле is_subscribed списков пользователей и
+    вложенных авторов не требовало запроса на каждую строку.
+    """
+    if not (request and request.user.is_authenticated):
+        return frozenset()
+    if '_subscribed_ids' not in request.__dict__:
+        request._subscribed_ids = frozenset(
+            request.user.subscriber.values_list('author_id', flat=True)
+        )
+    return request._subscribed_ids
+
+
+def split_param(value):
+    """Разбирает параметр запроса со списком через запятую."""
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_requested_fields(request, available):
+    """
+    Возвращает поля ответа с учётом параметров fields= и omit=,
+    сохраняя их исходный порядок.
+    """
+    fields = request.query_params.get('fields')
+    omit = request.query_params.get('omit')
+    if not (fields or omit):
+        return tuple(available)
+    requested = split_param(fields) if fields else set(available)
+    omitted = split_param(omit) if omit else set()
+    unknown = (requested | omitted) - set(available)
+    if unknown:
+        raise ValidationError({
+            'fields': [f'Неизвестные поля: {", ".join(sorted(unknown))}.']
+        })
+    return tuple(
+        name for name in available if name in requested - omitted
+    )
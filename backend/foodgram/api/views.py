@@ -1,32 +1,70 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+import os
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.http import (FileResponse, Http404, HttpResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from recipes.models import (Favorite, Ingredient, Recipe, RecipeIngredient,
-                            ShoppingCart, Tag, User)
+from core import metrics
+from core.cache import get_or_compute, make_key
+from core.constants import SERVINGS_MIN, SHOPPING_LIST_DIR
+from core.deletion import schedule_deletion
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingCart, Tag,
+                            User)
+from recipes.shopping import (get_shopping_ingredients, get_shopping_list_file,
+                              get_shopping_nutrition, bump_cart_version)
 from users.models import Subscribe
 
+from .export import stream_export
 from .filters import IngredientFilter, RecipeModelFilter
+from .indexes import ingredient_index
 from .pagination import LimitPagination
 from .permissions import IsAuthorOrIsAdminOrReadOnly
+from .projections import RecipeProjection
 from .serializers import (CustomUserSerializer, FavoriteSerializer,
                           IngredientSerializer, PostRecipeSerializer,
-                          RecipeSerializer, ShoppingSerializer,
-                          SubscribeSerializer, SubscribeWriteSerializer,
-                          TagSerializer)
+                          RecipeIdsSerializer, RecipeSerializer,
+                          ShoppingSerializer, SubscribeSerializer,
+                          SubscribeWriteSerializer, TagSerializer)
+from .snapshots import get_snapshot, represent_snapshot
+from .utils import get_requested_fields
+
+
+class CachedResponseMixin:
+    """
+    Кеширует данные ответов на чтение с защитой от одновременного
+    пересчёта одного и того же ключа несколькими процессами.
+    """
+    cache_namespace = None
+    cache_anonymous_only = False
+
+    def get_cached_response(self, get_response):
+        request = self.request
+        if self.cache_anonymous_only and request.user.is_authenticated:
+            return get_response()
+        key = make_key(
+            self.cache_namespace, request.get_host(), request.get_full_path()
+        )
+        return Response(get_or_compute(
+            self.cache_namespace, key, lambda: get_response().data,
+            namespace=self.cache_namespace
+        ))
 
 
 class CustomUserViewSet(UserViewSet):
     """Вьюсет пользователя."""
-    queryset = User.objects.all()
+    queryset = User.objects.filter(is_active=True)
     pagination_class = LimitPagination
     serializer_class = CustomUserSerializer
 
@@ -36,6 +74,22 @@ class CustomUserViewSet(UserViewSet):
             self.permission_classes = (IsAuthenticated,)
         return super(CustomUserViewSet, self).get_permissions()
 
+    def get_serializer(self, *args, **kwargs):
+        """Передаёт сериализатору поля, запрошенные в fields= и omit=."""
+        serializer_class = self.get_serializer_class()
+        if (
+            self.request.method == 'GET'
+            and issubclass(serializer_class, CustomUserSerializer)
+        ):
+            kwargs['fields'] = get_requested_fields(
+                self.request, serializer_class.Meta.fields
+            )
+        return super().get_serializer(*args, **kwargs)
+
+    def perform_destroy(self, instance):
+        """Деактивирует пользователя и ставит его удаление в очередь."""
+        schedule_deletion(instance)
+
     @action(
         detail=True,
         methods=('post',),
@@ -43,13 +97,11 @@ class CustomUserViewSet(UserViewSet):
     )
     def subscribe(self, request, **kwargs):
         """Создаёт объекты подписки."""
-        author = get_object_or_404(User, pk=self.kwargs.get('id'))
-        data = {
-            'author': author.id,
-            'user': request.user.id
-        }
+        author = get_object_or_404(
+            User, pk=self.kwargs.get('id'), is_active=True
+        )
         serializer = SubscribeWriteSerializer(
-            data=data, context={'request': request}
+            data={}, context={'request': request, 'author': author}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
@@ -58,47 +110,101 @@ class CustomUserViewSet(UserViewSet):
     @subscribe.mapping.delete
     def delete_subscribe(self, request, **kwargs):
         """Удаляет объекты подписки."""
-        author = get_object_or_404(User, pk=self.kwargs.get('id'))
+        author_id = self.kwargs.get('id')
         del_subscription, _ = Subscribe.objects.filter(
-            author=author, user=request.user
+            author_id=author_id, user=request.user
         ).delete()
         if not del_subscription:
+            get_object_or_404(User, pk=author_id)
             raise ValidationError('Вы не подписаны на этого пользователя.')
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=True, permission_classes=(IsAuthenticated,))
+    def export(self, request, **kwargs):
+        """
+        Отдаёт ZIP-архив с рецептами, изображениями, избранным,
+        списком покупок и подписками пользователя.
+
+        Архив собирается по мере отправки; выгружать можно свои
+        данные, сотрудникам - данные любого пользователя.
+        """
+        user = get_object_or_404(User, pk=self.kwargs.get('id'))
+        if user != request.user and not request.user.is_staff:
+            raise PermissionDenied('Можно выгрузить только свои данные.')
+        metrics.increment('export.started')
+        response = StreamingHttpResponse(
+            (chunk for chunk in stream_export(user) if chunk),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename=foodgram-{user.username}.zip'
+        )
+        return response
+
     @action(detail=False, permission_classes=(IsAuthenticated,))
     def subscriptions(self, request):
         """Отображает подписки пользователя."""
         user = request.user
-        queryset = User.objects.filter(subscribing__user=user)
+        fields = get_requested_fields(
+            request, SubscribeSerializer.Meta.fields
+        )
+        queryset = User.objects.filter(
+            subscribing__user=user, is_active=True
+        )
+        if 'recipes_count' in fields:
+            queryset = queryset.annotate(recipes_count=Count(
+                'recipes', filter=Q(recipes__is_active=True)
+            ))
         pages = self.paginate_queryset(queryset)
         serializer = SubscribeSerializer(
-            pages, many=True, context={'request': request}
+            pages, many=True, context={'request': request}, fields=fields
         )
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет тегов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_namespace = 'tags'
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            lambda: super(TagViewSet, self).list(request, *args, **kwargs)
+        )
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(CachedResponseMixin, ReadOnlyModelViewSet):
     """Вьюсет ингредиентов."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
+    cache_namespace = 'ingredients'
 
+    def list(self, request, *args, **kwargs):
+        """Ищет ингредиенты по началу названия в индексе процесса."""
+        return self.get_cached_response(
+            lambda: Response(ingredient_index.get().search(
+                request.query_params.get('name', '')
+            ))
+        )
 
-class RecipeViewSet(ModelViewSet):
+
+class RecipeViewSet(CachedResponseMixin, ModelViewSet):
     """Вьюсет рецептов."""
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeModelFilter
-    queryset = Recipe.objects.all()
+    queryset = Recipe.objects.filter(is_active=True)
     pagination_class = LimitPagination
     permission_classes = (IsAuthorOrIsAdminOrReadOnly,)
+    lookup_value_regex = r'\d+'
+    cache_namespace = 'recipes'
+    cache_anonymous_only = True
+
+    def get_fields(self):
+        """Возвращает поля рецепта, запрошенные в fields= и omit=."""
+        return get_requested_fields(self.request, RecipeProjection.fields)
 
     def get_serializer_class(self):
         """Возвращает нужный сериализатор, в зависимости от типа запроса."""
@@ -106,24 +212,203 @@ class RecipeViewSet(ModelViewSet):
             return RecipeSerializer
         return PostRecipeSerializer
 
+    def get_serializer(self, *args, **kwargs):
+        """Передаёт сериализатору поля, запрошенные в fields= и omit=."""
+        if self.request.method == 'GET':
+            kwargs['fields'] = self.get_fields()
+        return super().get_serializer(*args, **kwargs)
+
+    def get_recipes_page(self, queryset):
+        """
+        Отдаёт страницу рецептов, построенную из .values() без
+        сериализаторов DRF.
+        """
+        fields = self.get_fields()
+        page = self.paginate_queryset(
+            queryset.values(*RecipeProjection.get_values(fields))
+        )
+        return self.get_paginated_response(
+            RecipeProjection(self.request, fields).represent(page)
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            lambda: self.get_recipes_page(
+                self.filter_queryset(self.get_queryset())
+            )
+        )
+
+    def get_recipe_document(self):
+        """
+        Собирает рецепт из сохранённого снимка, добавляя поля,
+        зависящие от пользователя.
+        """
+        snapshot = get_snapshot(self.kwargs['pk'])
+        if snapshot is None:
+            raise Http404
+        return Response(represent_snapshot(
+            snapshot, self.request, self.get_fields()
+        ))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(self.get_recipe_document)
+
+    def perform_destroy(self, instance):
+        """Скрывает рецепт и ставит его удаление в очередь."""
+        schedule_deletion(instance)
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        """Отображает рецепты, похожие на данный."""
+        get_object_or_404(Recipe, pk=pk, is_active=True)
+        queryset = Recipe.objects.filter(
+            similar_to__recipe_id=pk, is_active=True
+        ).order_by('-similar_to__score')
+        return self.get_recipes_page(queryset)
+
+    @action(detail=False, permission_classes=(IsAuthenticated,))
+    def recommended(self, request):
+        """Отображает рецепты, похожие на избранные пользователем."""
+        user = request.user
+        queryset = Recipe.objects.filter(
+            similar_to__recipe__favorited__owner=user, is_active=True
+        ).exclude(
+            favorited__owner=user
+        ).annotate(
+            rank=Sum('similar_to__score')
+        ).order_by('-rank', 'id')
+        return self.get_recipes_page(queryset)
+
+    def list_changed(self, model, owner):
+        """Отмечает изменение избранного или списка покупок владельца."""
+        if model is ShoppingCart:
+            bump_cart_version(pk=owner.pk)
+
     def create_obj(self, serializer_model, pk, request):
-        """Создание объекта."""
-        data = {'recipe': pk, 'owner': request.user.id}
+        """
+        Создание объекта. Из тела запроса берётся только число порций,
+        тело, не являющееся объектом JSON, игнорируется.
+        """
+        data = {'recipe': pk}
+        if isinstance(request.data, Mapping) and 'servings' in request.data:
+            data['servings'] = request.data.get('servings')
         serializer = serializer_model(
             data=data, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
         serializer.save()
+        self.list_changed(type(serializer.instance), request.user)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def delete_obj(self, model, pk, owner):
         """Удаление объекта."""
-        recipe = get_object_or_404(Recipe, pk=pk)
         del_subscription, _ = model.objects.filter(
-            recipe=recipe, owner=owner
+            recipe_id=pk, owner=owner
         ).delete()
         if not del_subscription:
+            get_object_or_404(Recipe, pk=pk)
             raise ValidationError('Этого рецепта нет в списке.')
+        self.list_changed(model, owner)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_recipe_ids(self, request):
+        """Получает из запроса список id рецептов."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data['recipes']
+
+    def bulk_create_obj(self, model, request):
+        """Пакетное создание объектов."""
+        ids = self.get_recipe_ids(request)
+        owner = request.user
+        found = dict(
+            Recipe.objects.filter(id__in=ids, is_active=True).annotate(
+                in_list=Exists(model.objects.filter(
+                    owner=owner, recipe=OuterRef('pk')
+                ))
+            ).values_list('id', 'in_list')
+        )
+        model.objects.bulk_create(
+            [
+                model(owner=owner, recipe_id=recipe_id)
+                for recipe_id, in_list in found.items() if not in_list
+            ],
+            ignore_conflicts=True
+        )
+        results = [
+            {
+                'id': recipe_id,
+                'status': (
+                    'not_found' if recipe_id not in found
+                    else 'exists' if found[recipe_id] else 'created'
+                )
+            } for recipe_id in ids
+        ]
+        created = any(item['status'] == 'created' for item in results)
+        if created:
+            self.list_changed(model, owner)
+        return Response(
+            results,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    def bulk_delete_obj(self, model, request):
+        """Пакетное удаление объектов."""
+        ids = self.get_recipe_ids(request)
+        queryset = model.objects.filter(owner=request.user, recipe_id__in=ids)
+        present = set(queryset.values_list('recipe_id', flat=True))
+        queryset.delete()
+        if present:
+            self.list_changed(model, request.user)
+        return Response([
+            {
+                'id': recipe_id,
+                'status': 'deleted' if recipe_id in present else 'not_in_list'
+            } for recipe_id in ids
+        ])
+
+    @action(
+        detail=False,
+        methods=('post',),
+        url_path='favorite',
+        url_name='favorite-bulk',
+        permission_classes=(IsAuthenticated,)
+    )
+    def favorite_bulk(self, request):
+        """Добавляет в избранное несколько рецептов."""
+        return self.bulk_create_obj(model=Favorite, request=request)
+
+    @favorite_bulk.mapping.delete
+    def delete_favorite_bulk(self, request):
+        """Удаляет из избранного несколько рецептов."""
+        return self.bulk_delete_obj(model=Favorite, request=request)
+
+    @action(
+        detail=False,
+        methods=('post',),
+        url_path='shopping_cart',
+        url_name='shopping-cart-bulk',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_bulk(self, request):
+        """Добавляет в список покупок несколько рецептов."""
+        return self.bulk_create_obj(model=ShoppingCart, request=request)
+
+    @shopping_cart_bulk.mapping.delete
+    def delete_shopping_cart_bulk(self, request):
+        """Удаляет из списка покупок несколько рецептов."""
+        return self.bulk_delete_obj(model=ShoppingCart, request=request)
+
+    @action(
+        detail=False,
+        methods=('delete',),
+        url_path='shopping_cart/clear',
+        permission_classes=(IsAuthenticated,)
+    )
+    def clear_shopping_cart(self, request):
+        """Очищает список покупок."""
+        ShoppingCart.objects.filter(owner=request.user).delete()
+        self.list_changed(ShoppingCart, request.user)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=True, methods=('post',))
@@ -150,13 +435,30 @@ class RecipeViewSet(ModelViewSet):
             request=request
         )
 
+    @shopping_cart.mapping.patch
+    def update_shopping_cart(self, request, pk):
+        """Изменяет число порций рецепта в списке покупок."""
+        serializer = ShoppingSerializer(
+            data=request.data, partial=True, context={'request': request}
+        )
+        serializer.is_valid(raise_exception=True)
+        servings = serializer.validated_data.get('servings', SERVINGS_MIN)
+        updated = ShoppingCart.objects.filter(
+            recipe_id=pk, owner=request.user
+        ).update(servings=servings)
+        if not updated:
+            get_object_or_404(Recipe, pk=pk)
+            raise ValidationError('Этого рецепта нет в списке.')
+        self.list_changed(ShoppingCart, request.user)
+        return Response({'id': int(pk), 'servings': servings})
+
     @shopping_cart.mapping.delete
     def delete_shopping_cart(self, request, pk):
         """Удаляет объекты списка покупок."""
         return self.delete_obj(model=ShoppingCart, pk=pk, owner=request.user)
 
     @staticmethod
-    def get_shopping_list(ingredients, owner):
+    def get_shopping_list(ingredients, owner, nutrition=None):
         """Формирует содержимое файла со списком покупок."""
         header = (
             f'Список покупок.\nВладелец: {owner.first_name} '
@@ -165,29 +467,53 @@ class RecipeViewSet(ModelViewSet):
         shopping_list = '\n'.join(
             [
                 f'- {ingredient["ingredient__name"]} '
-                f' ({ingredient["ingredient__measurement_unit"]})'
+                f' ({ingredient["unit"]})'
                 f' {ingredient["amount"]} '
                 for ingredient in ingredients
             ]
         )
+        if nutrition and nutrition['calories'] is not None:
+            shopping_list += (
+                f'\nИтого: {nutrition["calories"]:.0f} ккал, '
+                f'белки {nutrition["proteins"]:.1f} г, '
+                f'жиры {nutrition["fats"]:.1f} г, '
+                f'углеводы {nutrition["carbohydrates"]:.1f} г.'
+            )
         return header + shopping_list
 
     @action(detail=False)
     def download_shopping_cart(self, request):
         """Даёт список покупок в виде тестового документа."""
-        owner = request.user
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__shopping__owner=owner
-        ).values(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).annotate(
-            amount=Sum('amount')
-        )
-        shopping_list = self.get_shopping_list(
-            ingredients=ingredients, owner=owner
+        # Пользователь из кеша токенов может хранить старую версию
+        # списка, поэтому владелец перечитывается из базы.
+        owner = User.objects.get(pk=request.user.pk)
+        name = get_shopping_list_file(
+            owner,
+            lambda: self.get_shopping_list(
+                ingredients=get_shopping_ingredients(owner), owner=owner,
+                nutrition=get_shopping_nutrition(owner)
+            )
         )
         filename = 'shopping_list.txt'
-        response = HttpResponse(shopping_list, content_type='text/plain')
+        if settings.SHOPPING_LIST_ACCEL:
+            response = HttpResponse(content_type='text/plain')
+            response['X-Accel-Redirect'] = (
+                f'{settings.MEDIA_URL}{SHOPPING_LIST_DIR}/{name}'
+            )
+        else:
+            response = FileResponse(
+                open(os.path.join(
+                    settings.MEDIA_ROOT, SHOPPING_LIST_DIR, name
+                ), 'rb'),
+                content_type='text/plain'
+            )
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
+
+
+class MetricsView(APIView):
+    """Отображает метрики текущего процесса."""
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(metrics.snapshot())
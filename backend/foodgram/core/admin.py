@@ -0,0 +1,127 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .deletion import schedule_deletion
+from .models import DeletionJob, SlowQuery, Task
+
+
+class DeferredDeletionMixin:
+    """
+    Удаляет объекты через DeletionJob: объект сразу деактивируется,
+    а зависящие от него записи удаляются пачками в фоне. Страница
+    подтверждения не собирает каскад связанных объектов.
+    """
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            []
+        )
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = (
+        'created',
+        'view',
+        'duration',
+        'database',
+        'fingerprint'
+    )
+    list_filter = ('database',)
+    search_fields = ('view', 'fingerprint', 'sql')
+    readonly_fields = (
+        'fingerprint',
+        'sql',
+        'params',
+        'duration',
+        'database',
+        'view',
+        'plan',
+        'created'
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'locked_by'
+    )
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = (
+        'name',
+        'args',
+        'kwargs',
+        'attempts',
+        'locked_by',
+        'locked_at',
+        'last_error',
+        'created',
+        'updated'
+    )
+    actions = ('retry',)
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Перезапустить выбранные задачи')
+    def retry(self, request, queryset):
+        queryset.exclude(status=Task.RUNNING).update(
+            status=Task.PENDING, attempts=0, run_at=timezone.now()
+        )
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'model',
+        'object_repr',
+        'status',
+        'rows_deleted',
+        'files_deleted',
+        'created',
+        'finished'
+    )
+    list_filter = ('status', 'model')
+    search_fields = ('object_repr', 'object_id')
+    readonly_fields = (
+        'model',
+        'object_id',
+        'object_repr',
+        'status',
+        'rows_deleted',
+        'files_deleted',
+        'progress',
+        'last_error',
+        'created',
+        'finished'
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
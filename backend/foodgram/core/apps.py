@@ -1,6 +1,13 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import checks, db, deletion, slow_queries  # noqa: F401
+        from .events import bus, connect_signals
+        connect_signals()
+        request_started.connect(bus.poll)
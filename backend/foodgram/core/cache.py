@@ -0,0 +1,98 @@
+import hashlib
+import math
+import random
+import time
+
+from django.core.cache import cache
+
+from . import constants, metrics
+
+VERSION_KEY = 'cache-version:{}'
+LOCK_KEY = 'cache-lock:{}'
+
+
+def make_key(*parts):
+    """Строит короткий ключ кеша, безопасный для любого бэкенда."""
+    return hashlib.md5(
+        ':'.join(map(str, parts)).encode()
+    ).hexdigest()
+
+
+def bump_version(namespace):
+    """Помечает устаревшими все значения пространства имён."""
+    key = VERSION_KEY.format(namespace)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def is_fresh(entry, version, beta):
+    """
+    Проверяет свежесть значения с вероятностным досрочным
+    истечением: чем дольше считается значение и чем ближе срок,
+    тем выше шанс пересчитать его заранее одним процессом.
+    """
+    value, expires, delta, entry_version = entry
+    if entry_version != version:
+        return False
+    return time.time() - delta * beta * math.log(
+        1 - random.random()
+    ) < expires
+
+
+def compute_and_store(key, compute, timeout, stale_timeout, version):
+    started = time.time()
+    value = compute()
+    delta = time.time() - started
+    cache.set(
+        key,
+        (value, time.time() + timeout, delta, version),
+        timeout + stale_timeout
+    )
+    return value
+
+
+def get_or_compute(name, key, compute, namespace=None,
+                   timeout=constants.API_CACHE_TIMEOUT,
+                   stale_timeout=constants.API_CACHE_STALE_TIMEOUT,
+                   beta=constants.CACHE_EARLY_EXPIRY_BETA):
+    """
+    Возвращает значение из кеша, пересчитывая его не более чем
+    в одном процессе одновременно.
+
+    Пока значение пересчитывается, остальные запросы получают
+    предыдущее (устаревшее) значение, а если его нет - ждут
+    результата до CACHE_LOCK_WAIT секунд.
+    """
+    version_key = VERSION_KEY.format(namespace)
+    values = cache.get_many([key, version_key] if namespace else [key])
+    entry = values.get(key)
+    version = values.get(version_key, 0)
+    if entry is not None and is_fresh(entry, version, beta):
+        metrics.increment(f'cache.{name}.hit')
+        return entry[0]
+    lock_key = LOCK_KEY.format(key)
+    if cache.add(lock_key, True, constants.CACHE_LOCK_TIMEOUT):
+        metrics.increment(
+            f'cache.{name}.{"miss" if entry is None else "refresh"}'
+        )
+        try:
+            return compute_and_store(
+                key, compute, timeout, stale_timeout, version
+            )
+        finally:
+            cache.delete(lock_key)
+    if entry is not None:
+        metrics.increment(f'cache.{name}.stale')
+        return entry[0]
+    deadline = time.monotonic() + constants.CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(constants.CACHE_LOCK_POLL)
+        entry = cache.get(key)
+        if entry is not None:
+            metrics.increment(f'cache.{name}.coalesced')
+            return entry[0]
+    metrics.increment(f'cache.{name}.lock_timeout')
+    return compute_and_store(key, compute, timeout, stale_timeout, version)
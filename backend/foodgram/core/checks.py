@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """
+    Предупреждает, что закрепление клиента за основной базой по токену
+    не работает между воркерами, если кеш не общий.
+    """
+    if (
+        settings.DATABASE_REPLICAS
+        and settings.CACHES['default']['BACKEND'] in LOCAL_CACHES
+    ):
+        return [Warning(
+            'Чтение с реплик включено, а кеш локален для процесса: '
+            'после записи клиент с токеном может прочитать устаревшие '
+            'данные в другом воркере.',
+            hint='Укажите CACHE_MEMCACHED_HOSTS.',
+            id='core.W001',
+        )]
+    return []
@@ -0,0 +1,66 @@
+import gzip
+
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+
+
+def parse_accept_encoding(header):
+    """Возвращает кодировки из Accept-Encoding с ненулевым весом."""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(header):
+    """Выбирает лучшую поддерживаемую кодировку для клиента."""
+    accepted = parse_accept_encoding(header)
+    for encoding in ENCODINGS:
+        if encoding in accepted or '*' in accepted:
+            return encoding
+    return None
+
+
+def compress(data, encoding, static=False):
+    """
+    Сжимает байты выбранной кодировкой.
+
+    Для заранее сжимаемых файлов используется максимальная степень
+    сжатия, для ответов API - более быстрая.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if static else 5)
+    if static:
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    return compress_string(data)
+
+
+def compress_stream(chunks, encoding):
+    """Сжимает потоковый ответ по частям."""
+    if encoding == 'gzip':
+        yield from compress_sequence(chunks)
+        return
+    compressor = brotli.Compressor(quality=5)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+        data = compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
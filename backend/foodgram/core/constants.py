@@ -4,3 +4,51 @@ INGREDIENT_NAME_LEN = MEASUREMENT_LEN = TAG_NAME_LEN = 200
 TAG_SLUG_LEN = RECIPE_NAME = 200
 COOKING_TIME_MIN = AMOUNT_MIN = 1
 COOKING_TIME_MAX = AMOUNT_MAX = 32000
+SIMILAR_RECIPES_TOP_K = 10
+SIMILAR_TAG_WEIGHT = 0.5
+SIMILARITY_CHUNK_SIZE = 1000
+SIMILARITY_METRICS = ('cosine', 'jaccard')
+BULK_RECIPES_MAX = 100
+SERVINGS_MIN = 1
+SERVINGS_MAX = 100
+UNIT_CONVERSIONS = {
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'ч. л.': ('мл', 5),
+    'ст. л.': ('мл', 15),
+    'стакан': ('мл', 250),
+}
+EVENT_MODEL_LEN = 100
+EVENT_OBJECT_ID_LEN = 64
+EVENT_ACTION_LEN = 16
+EVENT_POLL_LIMIT = 1000
+EVENT_GAP_LIMIT = 1000
+EVENT_GAP_TIMEOUT = 60
+CHANGE_EVENT_PRUNE_INTERVAL = 60
+API_CACHE_TIMEOUT = 60
+API_CACHE_STALE_TIMEOUT = 600
+CACHE_LOCK_TIMEOUT = 30
+CACHE_LOCK_WAIT = 2
+CACHE_LOCK_POLL = 0.05
+CACHE_EARLY_EXPIRY_BETA = 1.0
+ESTIMATED_COUNT_MIN = 10000
+ADMIN_LIST_PER_PAGE = 50
+SLOW_QUERY_FINGERPRINT_LEN = 40
+SLOW_QUERY_VIEW_LEN = 200
+SLOW_QUERY_PARAMS_LEN = 1000
+TASK_NAME_LEN = 200
+TASK_STATUS_LEN = 16
+TASK_WORKER_LEN = 100
+TASK_MAX_ATTEMPTS = 3
+TASK_LEASE_RENEWALS = 3
+SHOPPING_LIST_DIR = 'shopping_lists'
+SHOPPING_LIST_DIGEST_LEN = 32
+NUTRIENT_PER = 100
+NUTRIENT_PRECISION = 1
+NUTRITION_CHUNK_SIZE = 1000
+EXPORT_CHUNK_SIZE = 500
+EXPORT_FILE_CHUNK = 64 * 1024
+DELETION_REPR_LEN = 200
+DELETION_BATCH_SIZE = 1000
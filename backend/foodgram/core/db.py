@@ -0,0 +1,118 @@
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import OperationalError, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import metrics
+
+QUERY_CANCELED = '57014'
+SQLITE_PROGRESS_STEPS = 1000
+
+statement_timeout = ContextVar('statement_timeout', default=None)
+last_health_check = {}
+
+
+class StatementTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Превышено время выполнения запроса к базе данных.'
+    default_code = 'statement_timeout'
+
+
+def get_timeout():
+    """
+    Возвращает лимит времени запроса к базе в миллисекундах.
+
+    Вне запроса (миграции, воркер задач, команды) лимит не задаётся
+    и возвращается 0.
+    """
+    return statement_timeout.get() or 0
+
+
+def set_postgresql_timeout(connection, cursor, timeout):
+    """
+    Устанавливает statement_timeout сессии, если он изменился.
+
+    Внутри транзакции значение не меняется: откат транзакции
+    отменил бы SET, и запомненное значение разошлось бы с сессией.
+    """
+    if (
+        getattr(connection, 'statement_timeout', None) != timeout
+        and not connection.in_atomic_block
+    ):
+        cursor.execute('SET statement_timeout = %s', [timeout])
+        connection.statement_timeout = timeout
+
+
+@receiver(connection_created)
+def setup_connection(sender, connection, **kwargs):
+    """
+    Настраивает новое соединение и учитывает его в метриках.
+    statement_timeout устанавливается только внутри запроса.
+    """
+    metrics.increment(f'db.{connection.alias}.connections.created')
+    if connection.vendor == 'postgresql' and statement_timeout.get():
+        with connection.connection.cursor() as cursor:
+            set_postgresql_timeout(connection, cursor, get_timeout())
+
+
+@receiver(request_started)
+def check_connections(sender, **kwargs):
+    """
+    Проверяет постоянные соединения не чаще раза в
+    DB_HEALTH_CHECK_INTERVAL секунд и закрывает неработающие.
+    """
+    now = time.monotonic()
+    for connection in connections.all():
+        if connection.connection is None:
+            continue
+        metrics.increment(f'db.{connection.alias}.connections.reused')
+        if (
+            now - last_health_check.get(connection.alias, 0)
+            < settings.DB_HEALTH_CHECK_INTERVAL
+        ):
+            continue
+        last_health_check[connection.alias] = now
+        if not connection.is_usable():
+            metrics.increment(f'db.{connection.alias}.connections.broken')
+            connection.close()
+
+
+def timeout_wrapper(execute, sql, params, many, context):
+    """
+    Ограничивает время выполнения запроса: в PostgreSQL через
+    statement_timeout, в SQLite через обработчик прогресса.
+    """
+    connection = context['connection']
+    timeout = get_timeout()
+    if connection.vendor == 'postgresql':
+        set_postgresql_timeout(
+            connection, context['cursor'].cursor, timeout
+        )
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as error:
+            if getattr(error.__cause__, 'pgcode', None) == QUERY_CANCELED:
+                metrics.increment(f'db.{connection.alias}.timeouts')
+                raise StatementTimeout from error
+            raise
+    if connection.vendor != 'sqlite' or not timeout:
+        return execute(sql, params, many, context)
+    deadline = time.monotonic() + timeout / 1000
+    connection.connection.set_progress_handler(
+        lambda: time.monotonic() > deadline, SQLITE_PROGRESS_STEPS
+    )
+    try:
+        return execute(sql, params, many, context)
+    except OperationalError as error:
+        if 'interrupted' in str(error):
+            metrics.increment(f'db.{connection.alias}.timeouts')
+            raise StatementTimeout from error
+        raise
+    finally:
+        connection.connection.set_progress_handler(None, 0)
@@ -0,0 +1,173 @@
+import logging
+import traceback
+
+from django.apps import apps
+from django.db import connections, models, router, transaction
+from django.dispatch import Signal
+from django.utils import timezone
+
+from . import constants, metrics
+from .events import bus
+from .models import ChangeEvent, DeletionJob
+from .tasks import task
+
+logger = logging.getLogger(__name__)
+
+# Отправляется для каждой модели, записи которой deactivate помечает
+# неактивными: обновление queryset идёт без сигналов моделей, и
+# зависящие от записей данные обновляют получатели этого сигнала.
+deactivated = Signal()
+
+
+def get_dependants(model):
+    """
+    Возвращает пары (модель, поле) записей, удаляемых каскадно
+    вместе с объектами model, включая промежуточные таблицы
+    связей многие-ко-многим.
+    """
+    for relation in model._meta.related_objects:
+        if relation.on_delete is models.CASCADE:
+            yield relation.related_model, relation.field.name
+    for field in model._meta.many_to_many:
+        yield field.remote_field.through, field.m2m_field_name()
+
+
+def has_active_flag(model):
+    """Проверяет, есть ли у модели поле is_active."""
+    return any(field.name == 'is_active' for field in model._meta.fields)
+
+
+def deactivate(obj):
+    """
+    Помечает объект и каскадно зависящие от него объекты с полем
+    is_active неактивными, после чего они скрываются из API.
+    """
+    for related, field in get_dependants(type(obj)):
+        if has_active_flag(related):
+            queryset = related._base_manager.filter(**{field: obj.pk})
+            queryset.update(is_active=False)
+            deactivated.send(sender=related, queryset=queryset)
+    obj.is_active = False
+    obj.save(update_fields=('is_active',))
+    deactivated.send(
+        sender=type(obj), queryset=type(obj)._base_manager.filter(pk=obj.pk)
+    )
+
+
+def schedule_deletion(obj):
+    """Скрывает объект сразу и ставит его удаление в очередь задач."""
+    with transaction.atomic():
+        deactivate(obj)
+        job = DeletionJob.objects.create(
+            model=obj._meta.label_lower,
+            object_id=str(obj.pk),
+            object_repr=str(obj)[:constants.DELETION_REPR_LEN]
+        )
+        purge.delay(job.id)
+    return job
+
+
+def delete_rows(model, ids):
+    """Удаляет записи одним DELETE ... WHERE id IN без сборщика Django."""
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} IN ({placeholders})',
+            ids
+        )
+        return cursor.rowcount
+
+
+def delete_files(model, files):
+    """
+    Удаляет файлы из полей FileField записей, если на них больше
+    не ссылаются другие записи. Вызывается после удаления строк.
+    """
+    deleted = 0
+    for field, names in files.items():
+        referenced = set(model._base_manager.using(
+            router.db_for_write(model)
+        ).filter(**{f'{field.attname}__in': names}).values_list(
+            field.attname, flat=True
+        ))
+        for name in set(names) - referenced:
+            try:
+                field.storage.delete(name)
+            except OSError:
+                logger.warning('Could not delete file %s', name)
+                continue
+            deleted += 1
+    return deleted
+
+
+def get_files(model, ids):
+    """Возвращает имена файлов записей по полям FileField."""
+    queryset = model._base_manager.using(
+        router.db_for_write(model)
+    ).filter(pk__in=ids)
+    files = {}
+    for field in model._meta.fields:
+        if isinstance(field, models.FileField):
+            names = [
+                name for name in queryset.values_list(
+                    field.attname, flat=True
+                ) if name
+            ]
+            if names:
+                files[field] = names
+    return files
+
+
+def purge_objects(model, ids, job):
+    """
+    Удаляет записи model с данными id и всё, что от них зависит.
+
+    Зависимые записи удаляются пачками по DELETION_BATCH_SIZE, начиная
+    с самых дальних, поэтому ни сборщик удаления, ни одна транзакция
+    не держат в памяти и под блокировкой все строки сразу.
+    Возвращает число удалённых записей model.
+    """
+    for related, field in get_dependants(model):
+        queryset = related._base_manager.using(
+            router.db_for_write(related)
+        ).filter(**{f'{field}__in': ids}).values_list('pk', flat=True)
+        while batch := list(queryset[:constants.DELETION_BATCH_SIZE]):
+            if not purge_objects(related, batch, job):
+                break
+    files = get_files(model, ids)
+    deleted = delete_rows(model, ids)
+    label = model._meta.label_lower
+    job.progress[label] = job.progress.get(label, 0) + deleted
+    job.rows_deleted += deleted
+    job.files_deleted += delete_files(model, files)
+    DeletionJob.objects.filter(id=job.id).update(
+        rows_deleted=job.rows_deleted,
+        files_deleted=job.files_deleted,
+        progress=job.progress
+    )
+    return deleted
+
+
+@task
+def purge(job_id):
+    """Выполняет удаление, поставленное в очередь schedule_deletion."""
+    job = DeletionJob.objects.get(id=job_id)
+    model = apps.get_model(job.model)
+    DeletionJob.objects.filter(id=job.id).update(
+        status=DeletionJob.RUNNING
+    )
+    try:
+        purge_objects(model, [model._meta.pk.to_python(job.object_id)], job)
+    except Exception:
+        DeletionJob.objects.filter(id=job.id).update(
+            status=DeletionJob.FAILED, last_error=traceback.format_exc()
+        )
+        raise
+    DeletionJob.objects.filter(id=job.id).update(
+        status=DeletionJob.DONE, last_error='', finished=timezone.now()
+    )
+    metrics.increment('deletion.done')
+    bus.publish(job.model, job.object_id, ChangeEvent.DELETE)
@@ -0,0 +1,156 @@
+import logging
+import time
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import constants, metrics
+from .models import ChangeEvent
+
+logger = logging.getLogger(__name__)
+
+Event = namedtuple('Event', ('id', 'model', 'object_id', 'action'))
+
+
+class OutboxPollingBackend:
+    """
+    Бэкенд событий на основе таблицы ChangeEvent.
+
+    События пишутся в ту же транзакцию, что и изменение, а каждый
+    процесс периодически читает новые записи по возрастанию id.
+    Транзакция может получить id раньше другой, а зафиксироваться
+    позже, поэтому пропущенные id запоминаются и перечитываются ещё
+    EVENT_GAP_TIMEOUT секунд.
+    """
+
+    def __init__(self):
+        self.last_id = None
+        self.next_poll = 0
+        self.gaps = {}
+
+    def record(self, event):
+        ChangeEvent.objects.create(
+            model=event.model,
+            object_id=event.object_id,
+            action=event.action
+        )
+
+    def poll(self):
+        now = time.monotonic()
+        if now < self.next_poll:
+            return []
+        self.next_poll = now + settings.CHANGE_EVENT_POLL_INTERVAL
+        if self.last_id is None:
+            self.last_id = ChangeEvent.objects.order_by(
+                '-id'
+            ).values_list('id', flat=True).first() or 0
+            return []
+        self.gaps = {
+            event_id: expires for event_id, expires in self.gaps.items()
+            if expires > now
+        }
+        events = [
+            Event(*row) for row in ChangeEvent.objects.filter(
+                Q(id__gt=self.last_id) | Q(id__in=self.gaps)
+            ).order_by('id').values_list(
+                'id', 'model', 'object_id', 'action'
+            )[:constants.EVENT_POLL_LIMIT]
+        ]
+        found = {event.id for event in events}
+        for event_id in found:
+            self.gaps.pop(event_id, None)
+        if events and events[-1].id > self.last_id:
+            last_id = events[-1].id
+            start = max(self.last_id, last_id - constants.EVENT_GAP_LIMIT)
+            for event_id in range(start + 1, last_id):
+                if event_id not in found:
+                    self.gaps[event_id] = now + constants.EVENT_GAP_TIMEOUT
+            self.last_id = last_id
+        return events
+
+
+class InvalidationBus:
+    """Шина событий изменения для сброса локальных кешей процесса."""
+
+    def __init__(self):
+        self.handlers = defaultdict(list)
+        self._backend = None
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = import_string(settings.CHANGE_EVENT_BACKEND)()
+        return self._backend
+
+    def subscribe(self, model, handler):
+        """Подписывает обработчик на события модели app_label.model."""
+        self.handlers[model.lower()].append(handler)
+
+    def dispatch(self, events):
+        for event in events:
+            for handler in self.handlers.get(event.model, ()):
+                try:
+                    handler(event)
+                except Exception:
+                    logger.exception('Change event handler failed')
+        metrics.increment('events.dispatched', len(events))
+
+    def publish(self, model, object_id, action):
+        """
+        Записывает событие и сразу применяет его в текущем процессе
+        после фиксации транзакции. События моделей без подписчиков
+        не записываются.
+        """
+        if model not in self.handlers:
+            return
+        event = Event(None, model, str(object_id), action)
+        self.backend.record(event)
+        transaction.on_commit(lambda: self.dispatch([event]))
+
+    def poll(self, **kwargs):
+        """Применяет события, записанные другими процессами."""
+        self.dispatch(self.backend.poll())
+
+
+bus = InvalidationBus()
+
+
+def record_save(sender, instance, **kwargs):
+    bus.publish(sender._meta.label_lower, instance.pk, ChangeEvent.SAVE)
+
+
+def record_delete(sender, instance, **kwargs):
+    bus.publish(sender._meta.label_lower, instance.pk, ChangeEvent.DELETE)
+
+
+def connect_signals():
+    """
+    Подключает запись событий к моделям из CHANGE_EVENT_MODELS.
+
+    Изменения связей многие-ко-многим отдельно не записываются: они
+    сохраняются вместе с объектом, событие которого уже записано.
+    """
+    for label in settings.CHANGE_EVENT_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(record_save, sender=model)
+        post_delete.connect(record_delete, sender=model)
+
+
+def prune_change_events(seconds=None):
+    """
+    Удаляет события старше seconds секунд, по умолчанию
+    CHANGE_EVENT_KEEP. Вызывается воркером задач.
+    """
+    if seconds is None:
+        seconds = settings.CHANGE_EVENT_KEEP
+    deleted, _ = ChangeEvent.objects.filter(
+        created__lt=timezone.now() - timedelta(seconds=seconds)
+    ).delete()
+    return deleted
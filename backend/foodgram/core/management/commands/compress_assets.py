@@ -0,0 +1,47 @@
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core.compression import ENCODINGS, EXTENSIONS, compress
+
+
+class Command(BaseCommand):
+    help = 'Precompress static files and docs for nginx *_static serving'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Directories to compress, STATIC_ROOT by default'
+        )
+
+    def compress_file(self, path):
+        data = path.read_bytes()
+        written = 0
+        for encoding in ENCODINGS:
+            target = path.with_name(path.name + EXTENSIONS[encoding])
+            if (
+                target.exists()
+                and target.stat().st_mtime >= path.stat().st_mtime
+            ):
+                continue
+            content = compress(data, encoding, static=True)
+            if len(content) >= len(data):
+                continue
+            target.write_bytes(content)
+            os.utime(target, (path.stat().st_atime, path.stat().st_mtime))
+            written += 1
+        return written
+
+    def handle(self, *args, **options):
+        total = 0
+        for root in options['paths'] or [settings.STATIC_ROOT]:
+            for path in Path(root).rglob('*'):
+                if (
+                    path.is_file()
+                    and path.suffix in settings.COMPRESSION_EXTENSIONS
+                    and path.stat().st_size >= settings.COMPRESSION_MIN_LENGTH
+                ):
+                    total += self.compress_file(path)
+        self.stdout.write(f'Wrote {total} compressed files')
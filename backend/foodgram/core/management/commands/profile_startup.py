@@ -0,0 +1,219 @@
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+IMPORT_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+# Процесс воркера: загрузка приложения как в foodgram.wsgi, затем
+# функция замера из этого модуля.
+CHILD = '''
+import os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {base!r})
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', {settings!r})
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from core.management.commands.profile_startup import {func}
+{func}(started, {workers})
+'''
+
+
+def warm_up(freeze):
+    from core.preload import warm_up
+
+    warm_up(freeze=freeze)
+
+
+def serve_first_request():
+    """Выполняет работу первого запроса: резолвер и индексы."""
+    from django.urls import resolve
+
+    from api.indexes import ingredient_index, tag_map
+
+    resolve('/api/ingredients/')
+    tag_map.get()
+    ingredient_index.get().search('а')
+
+
+def report(**data):
+    sys.stdout.write(json.dumps(data) + '\n')
+    sys.stdout.flush()
+
+
+def measure_worker(started, ready, go):
+    """
+    Готовит воркер к первому запросу, сообщает о готовности и после
+    сигнала, когда все воркеры запущены, замеряет память. Воркер
+    завершается только после замера всех, чтобы PSS был сопоставим.
+    """
+    from core.memory import get_memory_usage, get_rss
+
+    serve_first_request()
+    elapsed = time.perf_counter() - started
+    os.write(ready, b'.')
+    os.read(go, 1)
+    usage = get_memory_usage() or {'rss': get_rss(), 'pss': 0, 'uss': 0}
+    return {'start_ms': elapsed * 1000, **usage}
+
+
+def cold_worker(started, workers):
+    """Воркер без предзагрузки: всё загружается в нём самом."""
+    warm_up(freeze=False)
+    report(**measure_worker(
+        started, sys.stdout.fileno(), sys.stdin.fileno()
+    ))
+    sys.stdin.read()
+
+
+def preload_master(started, workers):
+    """Мастер с предзагрузкой: готовит приложение и форкает воркеры."""
+    from core.memory import get_memory_usage
+
+    warm_up(freeze=True)
+    master_ms = (time.perf_counter() - started) * 1000
+    ready_read, ready_write = os.pipe()
+    go_read, go_write = os.pipe()
+    exit_read, exit_write = os.pipe()
+    result_read, result_write = os.pipe()
+    pids = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            os.close(go_write)
+            os.close(exit_write)
+            result = measure_worker(time.perf_counter(), ready_write, go_read)
+            os.write(result_write, (json.dumps(result) + '\n').encode())
+            os.read(exit_read, 1)
+            os._exit(0)
+        pids.append(pid)
+    for _ in range(workers):
+        os.read(ready_read, 1)
+    os.close(go_write)
+    with os.fdopen(result_read) as results:
+        measured = [json.loads(results.readline()) for _ in range(workers)]
+    master = get_memory_usage()
+    os.close(exit_write)
+    for pid in pids:
+        os.waitpid(pid, 0)
+    report(master_ms=master_ms, master=master, workers=measured)
+
+
+class Command(BaseCommand):
+    help = (
+        'Profile application startup: import time per module and cold '
+        'start time and memory of workers with and without preloading'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--skip-imports', action='store_true')
+        parser.add_argument('--skip-workers', action='store_true')
+
+    def get_child(self, func, workers=0):
+        return [sys.executable, '-c', CHILD.format(
+            base=str(settings.BASE_DIR),
+            settings=os.environ['DJANGO_SETTINGS_MODULE'],
+            func=func,
+            workers=workers
+        )]
+
+    def profile_imports(self, top):
+        """Печатает время импорта по пакетам и самые долгие модули."""
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', *self.get_child(
+                'cold_worker'
+            )[1:]],
+            input='.', capture_output=True, text=True, cwd=settings.BASE_DIR
+        )
+        modules = []
+        packages = defaultdict(int)
+        for line in result.stderr.splitlines():
+            match = IMPORT_LINE.match(line)
+            if match:
+                own, cumulative, indent, name = match.groups()
+                modules.append((int(cumulative), int(own), name))
+                packages[name.split('.')[0]] += int(own)
+        total = sum(packages.values())
+        self.stdout.write(f'Imports: {len(modules)} modules, '
+                          f'{total / 1000:.0f} ms')
+        self.stdout.write('Packages by own import time:')
+        for name, own in sorted(
+            packages.items(), key=lambda item: -item[1]
+        )[:top]:
+            self.stdout.write(
+                f'  {name:<32} {own / 1000:8.1f} ms {own / total:6.1%}'
+            )
+        self.stdout.write('Modules by cumulative import time:')
+        for cumulative, own, name in sorted(modules, reverse=True)[:top]:
+            self.stdout.write(
+                f'  {name:<48} {cumulative / 1000:8.1f} ms '
+                f'(own {own / 1000:.1f} ms)'
+            )
+
+    def run_cold(self, workers):
+        """Запускает воркеры отдельными процессами без предзагрузки."""
+        processes = [
+            subprocess.Popen(
+                self.get_child('cold_worker'), cwd=settings.BASE_DIR,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE
+            ) for _ in range(workers)
+        ]
+        for process in processes:
+            process.stdout.read(1)
+        for process in processes:
+            process.stdin.write(b'.')
+            process.stdin.flush()
+        results = [
+            json.loads(process.stdout.readline()) for process in processes
+        ]
+        for process in processes:
+            process.communicate()
+        return results
+
+    def run_preload(self, workers):
+        """Запускает мастер с предзагрузкой, который форкает воркеры."""
+        output = subprocess.run(
+            self.get_child('preload_master', workers),
+            cwd=settings.BASE_DIR, capture_output=True, check=True
+        ).stdout
+        return json.loads(output)
+
+    def write_workers(self, title, workers):
+        self.stdout.write(title)
+        for number, worker in enumerate(workers, 1):
+            self.stdout.write(
+                f'  worker {number}: start {worker["start_ms"]:7.1f} ms, '
+                f'rss {worker["rss"] / 2 ** 20:6.1f} MB, '
+                f'pss {worker["pss"] / 2 ** 20:6.1f} MB, '
+                f'uss {worker["uss"] / 2 ** 20:6.1f} MB'
+            )
+        self.stdout.write(
+            '  total: pss '
+            f'{sum(w["pss"] for w in workers) / 2 ** 20:.1f} MB, uss '
+            f'{sum(w["uss"] for w in workers) / 2 ** 20:.1f} MB'
+        )
+
+    def handle(self, *args, **options):
+        if not options['skip_imports']:
+            self.profile_imports(options['top'])
+        if options['skip_workers']:
+            return
+        workers = options['workers']
+        self.write_workers(
+            f'Without preload, {workers} workers:', self.run_cold(workers)
+        )
+        preload = self.run_preload(workers)
+        self.write_workers(
+            f'With preload, {workers} workers '
+            f'(master ready in {preload["master_ms"]:.1f} ms, '
+            f'pss {preload["master"]["pss"] / 2 ** 20:.1f} MB):',
+            preload['workers']
+        )
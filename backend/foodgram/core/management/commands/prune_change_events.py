@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.events import prune_change_events
+
+
+class Command(BaseCommand):
+    help = 'Delete processed change events older than the given age'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int,
+            help='Defaults to CHANGE_EVENT_KEEP seconds'
+        )
+
+    def handle(self, *args, **options):
+        hours = options['hours']
+        deleted = prune_change_events(
+            None if hours is None else hours * 3600
+        )
+        self.stdout.write(f'Deleted {deleted} change events')
@@ -0,0 +1,69 @@
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils.module_loading import autodiscover_modules
+
+from core.constants import CHANGE_EVENT_PRUNE_INTERVAL
+from core.events import prune_change_events
+from core.tasks import claim, requeue_stale, run
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run background tasks from the task table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--poll-interval', type=float, default=1)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when no tasks are ready'
+        )
+
+    def execute_task(self, task_obj):
+        close_old_connections()
+        try:
+            return run(task_obj)
+        except Exception:
+            logger.exception('Worker failed to run task %s', task_obj.id)
+        finally:
+            connections.close_all()
+
+    def handle(self, *args, **options):
+        autodiscover_modules('tasks')
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: stop.set())
+        slots = threading.Semaphore(options['threads'])
+        processed = 0
+        next_prune = 0
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            while not stop.is_set():
+                requeue_stale()
+                if time.monotonic() >= next_prune:
+                    prune_change_events()
+                    next_prune = time.monotonic() + CHANGE_EVENT_PRUNE_INTERVAL
+                free = 0
+                while slots.acquire(blocking=False):
+                    free += 1
+                tasks = claim(worker, free) if free else []
+                for _ in range(free - len(tasks)):
+                    slots.release()
+                for task_obj in tasks:
+                    future = executor.submit(self.execute_task, task_obj)
+                    future.add_done_callback(lambda future: slots.release())
+                processed += len(tasks)
+                if not tasks:
+                    if options['once'] and free == options['threads']:
+                        break
+                    stop.wait(options['poll_interval'])
+        self.stdout.write(f'Processed {processed} tasks')
@@ -0,0 +1,140 @@
+import logging
+import os
+import resource
+import tracemalloc
+
+from django.conf import settings
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+KB = 1024
+MB = 1024 * 1024
+DELTA_BUCKETS = (0, 64, 256, 1024, 4096, 16384, 65536)
+RSS_BUCKETS = (64, 128, 256, 384, 512, 768, 1024, 2048)
+
+state = {'requests': 0, 'snapshot': None, 'recycle': False}
+
+
+def get_rss():
+    """Возвращает текущий RSS процесса в байтах."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * KB
+
+
+def get_peak_rss():
+    """Возвращает пиковый RSS (VmHWM) в байтах или None."""
+    try:
+        with open('/proc/self/status') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * KB
+    except OSError:
+        pass
+    return None
+
+
+def get_memory_usage():
+    """
+    Возвращает RSS, PSS и USS (частные страницы) процесса в байтах
+    по /proc/self/smaps_rollup или None, если файл недоступен.
+    """
+    usage = {'rss': 0, 'pss': 0, 'uss': 0}
+    try:
+        with open('/proc/self/smaps_rollup') as file:
+            for line in file:
+                name, _, value = line.partition(':')
+                if name == 'Rss':
+                    usage['rss'] = int(value.split()[0]) * KB
+                elif name == 'Pss':
+                    usage['pss'] = int(value.split()[0]) * KB
+                elif name in ('Private_Clean', 'Private_Dirty'):
+                    usage['uss'] += int(value.split()[0]) * KB
+    except OSError:
+        return None
+    return usage
+
+
+def reset_peak_rss():
+    """Сбрасывает пиковый RSS процесса, если ядро это позволяет."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+
+def start_tracing():
+    """Включает tracemalloc, если задано MEMORY_TRACEMALLOC_FRAMES."""
+    if settings.MEMORY_TRACEMALLOC_FRAMES and not tracemalloc.is_tracing():
+        tracemalloc.start(settings.MEMORY_TRACEMALLOC_FRAMES)
+
+
+def log_allocations():
+    """
+    Каждые MEMORY_SNAPSHOT_INTERVAL запросов сравнивает снимок
+    tracemalloc с предыдущим и пишет в лог места наибольшего роста.
+    """
+    state['requests'] += 1
+    if (
+        not tracemalloc.is_tracing()
+        or state['requests'] % settings.MEMORY_SNAPSHOT_INTERVAL
+    ):
+        return
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    ))
+    previous, state['snapshot'] = state['snapshot'], snapshot
+    if previous is None:
+        return
+    growth = [
+        stat for stat in snapshot.compare_to(previous, 'lineno')
+        if stat.size_diff > 0
+    ]
+    for stat in growth[:settings.MEMORY_SNAPSHOT_TOP]:
+        logger.info('Allocation growth: %s', stat)
+
+
+def record(view, before, after):
+    """
+    Учитывает изменение памяти за запрос в метриках и логе и
+    запрашивает перезапуск воркера при превышении MEMORY_RECYCLE_RSS.
+    """
+    delta = (after - before) // KB
+    peak = get_peak_rss()
+    metrics.observe(f'memory.{view}.rss_delta_kb', delta, DELTA_BUCKETS)
+    metrics.observe('memory.rss_mb', after // MB, RSS_BUCKETS)
+    if tracemalloc.is_tracing():
+        metrics.observe(
+            f'memory.{view}.traced_peak_kb',
+            tracemalloc.get_traced_memory()[1] // KB, DELTA_BUCKETS
+        )
+    if delta >= settings.MEMORY_LOG_THRESHOLD:
+        logger.warning(
+            'Memory grew by %s KB in %s: rss=%s MB peak=%s MB',
+            delta, view, after // MB, peak // MB if peak else '-'
+        )
+    log_allocations()
+    if (
+        settings.MEMORY_RECYCLE_RSS
+        and after >= settings.MEMORY_RECYCLE_RSS * MB
+        and not state['recycle']
+    ):
+        logger.warning(
+            'RSS %s MB exceeds MEMORY_RECYCLE_RSS, recycling worker %s',
+            after // MB, os.getpid()
+        )
+        metrics.increment('memory.recycles')
+        state['recycle'] = True
+
+
+def should_recycle():
+    """Сообщает, что воркер превысил лимит памяти."""
+    return state['recycle']
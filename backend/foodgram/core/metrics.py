@@ -0,0 +1,52 @@
+import bisect
+import threading
+from collections import Counter
+
+DEFAULT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000, 10000)
+
+lock = threading.Lock()
+counters = Counter()
+histograms = {}
+
+
+def increment(name, value=1):
+    """Увеличивает счётчик."""
+    with lock:
+        counters[name] += value
+
+
+def observe(name, value, buckets=DEFAULT_BUCKETS):
+    """Добавляет значение в гистограмму с фиксированными корзинами."""
+    with lock:
+        histogram = histograms.setdefault(name, {
+            'buckets': buckets,
+            'counts': [0] * (len(buckets) + 1),
+            'sum': 0,
+            'count': 0,
+            'max': value,
+        })
+        histogram['counts'][
+            bisect.bisect_left(histogram['buckets'], value)
+        ] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+        histogram['max'] = max(histogram['max'], value)
+
+
+def snapshot():
+    """Возвращает копию метрик текущего процесса."""
+    with lock:
+        return {
+            'counters': dict(counters),
+            'histograms': {
+                name: {
+                    'buckets': dict(zip(
+                        [*map(str, histogram['buckets']), 'inf'],
+                        histogram['counts']
+                    )),
+                    'sum': histogram['sum'],
+                    'count': histogram['count'],
+                    'max': histogram['max'],
+                } for name, histogram in histograms.items()
+            },
+        }
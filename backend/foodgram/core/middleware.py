@@ -0,0 +1,266 @@
+import hashlib
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from rest_framework.permissions import SAFE_METHODS
+
+from .compression import choose_encoding, compress, compress_stream
+from .db import statement_timeout, timeout_wrapper
+from .memory import get_rss, record, reset_peak_rss, start_tracing
+from .profiling import (PROFILE_TEXT, format_stats, get_mode, get_phases,
+                        is_staff, profile, save_profile)
+from .routers import read_from_replica
+from .slow_queries import (pending_slow_queries, slow_queries,
+                           slow_query_wrapper)
+
+PIN_COOKIE = 'primary_pin'
+PIN_CACHE_KEY = 'replica-pin:{}'
+
+
+def get_view_name(request, view_func):
+    """Возвращает имя представления и действия вьюсета для запроса."""
+    view = getattr(view_func, 'cls', view_func)
+    name = f'{view.__module__}.{view.__qualname__}'
+    action = (getattr(view_func, 'actions', None) or {}).get(
+        request.method.lower()
+    )
+    return f'{name}.{action}' if action else name
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы brotli или gzip в зависимости от Accept-Encoding.
+
+    Короткие ответы и уже сжатые типы содержимого не сжимаются,
+    потоковые ответы сжимаются по частям без буферизации.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type in settings.COMPRESSION_SKIP_TYPES or (
+            content_type.startswith(('image/', 'video/', 'audio/'))
+        ):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Профилирует запрос сотрудника с заголовком X-Profile или
+    параметром _profile.
+
+    Статистика сохраняется в PROFILING_DIR, время фаз DRF
+    возвращается в заголовке Server-Timing, а при значении text
+    вместо ответа возвращается текстовый отчёт pstats.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = get_mode(request)
+        if mode is None or not is_staff(request):
+            return self.get_response(request)
+        response, profiler, stats = profile(self.get_response, request)
+        name = save_profile(profiler, request)
+        if mode == PROFILE_TEXT:
+            response = HttpResponse(
+                format_stats(stats), content_type='text/plain'
+            )
+        response['Server-Timing'] = ', '.join(
+            f'{phase};dur={duration:.1f}'
+            for phase, duration in get_phases(stats).items()
+        )
+        if name:
+            response['X-Profile-Id'] = name
+        return response
+
+
+class ReplicaMiddleware:
+    """
+    Разрешает читать с реплик в безопасных запросах к API.
+
+    После успешного изменяющего запроса клиент на REPLICA_PIN_SECONDS
+    закрепляется за основной базой (по cookie и по токену), чтобы
+    сразу видеть свои изменения. Закрепление по токену хранится в кеше
+    и действует во всех воркерах только с общим кешем (core.W001).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def get_pin_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return None
+        return PIN_CACHE_KEY.format(
+            hashlib.sha256(authorization.encode()).hexdigest()
+        )
+
+    def is_pinned(self, request):
+        if request.COOKIES.get(PIN_COOKIE):
+            return True
+        key = self.get_pin_key(request)
+        return bool(key and cache.get(key))
+
+    def pin(self, request, response):
+        key = self.get_pin_key(request)
+        if key:
+            cache.set(key, True, settings.REPLICA_PIN_SECONDS)
+        response.set_cookie(
+            PIN_COOKIE, '1',
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax'
+        )
+
+    def __call__(self, request):
+        if request.method not in SAFE_METHODS:
+            response = self.get_response(request)
+            if response.status_code < 400:
+                self.pin(request, response)
+            return response
+        if (
+            not settings.DATABASE_REPLICAS
+            or not request.path.startswith(settings.REPLICA_READ_PATHS)
+            or self.is_pinned(request)
+        ):
+            return self.get_response(request)
+        token = read_from_replica.set(True)
+        try:
+            return self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+
+
+class StatementTimeoutMiddleware:
+    """
+    Ограничивает время запросов к базе в зависимости от действия
+    вьюсета: короткий лимит для списков, длинный для выгрузок.
+
+    Лимит берётся из атрибута statement_timeouts вьюсета или из
+    настройки STATEMENT_TIMEOUTS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = statement_timeout.set(settings.STATEMENT_TIMEOUTS['default'])
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(timeout_wrapper)
+                    )
+                return self.get_response(request)
+        finally:
+            statement_timeout.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        actions = getattr(view_func, 'actions', None) or {}
+        action = actions.get(request.method.lower())
+        timeouts = {
+            **settings.STATEMENT_TIMEOUTS,
+            **getattr(getattr(view_func, 'cls', None),
+                      'statement_timeouts', {}),
+        }
+        if action in timeouts:
+            statement_timeout.set(timeouts[action])
+
+
+class SlowQueryMiddleware:
+    """
+    Записывает запросы к базе дольше SLOW_QUERY_THRESHOLD мс вместе с
+    представлением, из которого они выполнялись, и их планами.
+
+    Планы строятся и сохраняются обработчиком сигнала request_finished
+    после отправки тела клиенту и вне обёртки с лимитом времени,
+    поэтому EXPLAIN не задерживает ответ.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.SLOW_QUERY_LOG:
+            return self.get_response(request)
+        queries = []
+        token = slow_queries.set(queries)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(slow_query_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            slow_queries.reset(token)
+        if queries:
+            pending_slow_queries.set(
+                (queries, getattr(request, 'view_name', request.path))
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = get_view_name(request, view_func)
+
+
+class MemoryMiddleware:
+    """
+    Отслеживает изменение RSS воркера за запрос по представлениям и
+    помечает воркер к перезапуску при превышении MEMORY_RECYCLE_RSS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        start_tracing()
+
+    def __call__(self, request):
+        if not settings.MEMORY_TRACKING:
+            return self.get_response(request)
+        reset_peak_rss()
+        before = get_rss()
+        response = self.get_response(request)
+        record(
+            getattr(request, 'view_name', 'unresolved'), before, get_rss()
+        )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_name = get_view_name(request, view_func)
@@ -0,0 +1,29 @@
+# Generated by Django 3.2 on 2026-10-19 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Модель')),
+                ('object_id', models.CharField(max_length=64, verbose_name='Id объекта')),
+                ('action', models.CharField(choices=[('save', 'Сохранение'), ('delete', 'Удаление'), ('m2m', 'Изменение связей')], max_length=16, verbose_name='Действие')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Создано')),
+            ],
+            options={
+                'verbose_name': 'Событие изменения',
+                'verbose_name_plural': 'События изменения',
+                'ordering': ('id',),
+            },
+        ),
+    ]
@@ -0,0 +1,208 @@
+from django.db import models
+from django.utils import timezone
+
+from core import constants
+
+
+class ChangeEvent(models.Model):
+    """Модель событий изменения данных для сброса локальных кешей."""
+    SAVE = 'save'
+    DELETE = 'delete'
+    M2M = 'm2m'
+    ACTIONS = (
+        (SAVE, 'Сохранение'),
+        (DELETE, 'Удаление'),
+        (M2M, 'Изменение связей'),
+    )
+    model = models.CharField(
+        max_length=constants.EVENT_MODEL_LEN,
+        verbose_name='Модель'
+    )
+    object_id = models.CharField(
+        max_length=constants.EVENT_OBJECT_ID_LEN,
+        verbose_name='Id объекта'
+    )
+    action = models.CharField(
+        max_length=constants.EVENT_ACTION_LEN,
+        choices=ACTIONS,
+        verbose_name='Действие'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Создано'
+    )
+
+    class Meta:
+        verbose_name = 'Событие изменения'
+        verbose_name_plural = 'События изменения'
+        ordering = ('id',)
+
+    def __str__(self):
+        return f'{self.model} {self.object_id} {self.action}'
+
+
+class SlowQuery(models.Model):
+    """Модель медленных запросов к базе с планами выполнения."""
+    fingerprint = models.CharField(
+        max_length=constants.SLOW_QUERY_FINGERPRINT_LEN,
+        db_index=True,
+        verbose_name='Отпечаток'
+    )
+    sql = models.TextField(verbose_name='Нормализованный SQL')
+    params = models.TextField(blank=True, verbose_name='Параметры')
+    duration = models.FloatField(verbose_name='Длительность, мс')
+    database = models.CharField(
+        max_length=constants.EVENT_MODEL_LEN,
+        verbose_name='База данных'
+    )
+    view = models.CharField(
+        max_length=constants.SLOW_QUERY_VIEW_LEN,
+        blank=True,
+        verbose_name='Представление'
+    )
+    plan = models.TextField(blank=True, verbose_name='План выполнения')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name='Создано'
+    )
+
+    class Meta:
+        verbose_name = 'Медленный запрос'
+        verbose_name_plural = 'Медленные запросы'
+        ordering = ('-id',)
+
+    def __str__(self):
+        return f'{self.view} {self.duration:.0f} мс'
+
+
+class Task(models.Model):
+    """Модель фоновых задач."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField(
+        max_length=constants.TASK_NAME_LEN,
+        verbose_name='Задача'
+    )
+    args = models.JSONField(default=list, verbose_name='Аргументы')
+    kwargs = models.JSONField(
+        default=dict,
+        verbose_name='Именованные аргументы'
+    )
+    status = models.CharField(
+        max_length=constants.TASK_STATUS_LEN,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=constants.TASK_MAX_ATTEMPTS,
+        verbose_name='Максимум попыток'
+    )
+    locked_by = models.CharField(
+        max_length=constants.TASK_WORKER_LEN,
+        blank=True,
+        verbose_name='Воркер'
+    )
+    locked_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Взята в работу'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создана'
+    )
+    updated = models.DateTimeField(auto_now=True, verbose_name='Обновлена')
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-id',)
+        indexes = [
+            models.Index(fields=('status', 'run_at'), name='task_queue'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} {self.status}'
+
+
+class DeletionJob(models.Model):
+    """Модель фонового удаления объекта и зависящих от него записей."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ожидает'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+        (FAILED, 'Ошибка'),
+    )
+    model = models.CharField(
+        max_length=constants.EVENT_MODEL_LEN,
+        verbose_name='Модель'
+    )
+    object_id = models.CharField(
+        max_length=constants.EVENT_OBJECT_ID_LEN,
+        verbose_name='Id объекта'
+    )
+    object_repr = models.CharField(
+        max_length=constants.DELETION_REPR_LEN,
+        blank=True,
+        verbose_name='Объект'
+    )
+    status = models.CharField(
+        max_length=constants.TASK_STATUS_LEN,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    rows_deleted = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено записей'
+    )
+    files_deleted = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Удалено файлов'
+    )
+    progress = models.JSONField(
+        default=dict,
+        verbose_name='Удалено по таблицам'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    finished = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Завершено'
+    )
+
+    class Meta:
+        verbose_name = 'Удаление'
+        verbose_name_plural = 'Удаления'
+        ordering = ('-id',)
+
+    def __str__(self):
+        return f'{self.model} {self.object_repr} {self.status}'
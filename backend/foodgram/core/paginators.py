@@ -0,0 +1,32 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from core import constants
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор, использующий оценку числа строк из статистики
+    PostgreSQL для больших таблиц без фильтров вместо COUNT(*).
+    """
+
+    def get_estimate(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql' or queryset.query.where:
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    @cached_property
+    def count(self):
+        estimate = self.get_estimate()
+        if estimate is not None and estimate >= constants.ESTIMATED_COUNT_MIN:
+            return estimate
+        return super().count
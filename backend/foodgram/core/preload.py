@@ -0,0 +1,82 @@
+import gc
+import logging
+import threading
+from importlib import import_module
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.urls import get_resolver
+
+from .events import bus
+
+logger = logging.getLogger(__name__)
+
+indexes = {}
+
+
+class LocalIndex:
+    """
+    Неизменяемая структура в памяти процесса, собираемая из базы.
+
+    Собирается при первом обращении или заранее в мастер-процессе
+    gunicorn (warm_up), чтобы воркеры получили её через fork и
+    разделяли страницы памяти. reset() сбрасывает структуру по
+    событию шины; следующее обращение соберёт её заново.
+    """
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.value = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        value = self.value
+        if value is None:
+            with self.lock:
+                if self.value is None:
+                    self.value = self.loader()
+                value = self.value
+        return value
+
+    def reset(self, event=None):
+        self.value = None
+
+    def refresh(self):
+        self.reset()
+        return self.get()
+
+
+def register(name, loader):
+    """Регистрирует индекс для сборки в warm_up."""
+    indexes[name] = LocalIndex(name, loader)
+    return indexes[name]
+
+
+def warm_up(freeze=True):
+    """
+    Готовит процесс к обработке запросов до первого запроса.
+
+    Импортирует модули из PRELOAD_MODULES, заполняет URL-резолвер,
+    собирает зарегистрированные индексы и закрывает соединения с базой,
+    чтобы они не унаследовались воркерами. С freeze=True переносит
+    созданные объекты в постоянное поколение сборщика мусора: он не
+    трогает их заголовки, и страницы остаются общими после fork.
+    """
+    for name in settings.PRELOAD_MODULES:
+        import_module(name)
+    # Обращение к reverse_dict импортирует urlconf и вьюхи и
+    # заполняет таблицы резолвера.
+    get_resolver().reverse_dict
+    try:
+        bus.poll()
+        for index in indexes.values():
+            index.get()
+    except DatabaseError:
+        logger.warning('Could not preload indexes, they will load lazily')
+        for index in indexes.values():
+            index.reset()
+    connections.close_all()
+    if freeze:
+        gc.collect()
+        gc.freeze()
@@ -0,0 +1,122 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import re
+import time
+import uuid
+
+from django.conf import settings
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_PARAM = '_profile'
+PROFILE_TEXT = 'text'
+PROFILE_TEXT_LINES = 60
+
+PHASES = (
+    ('authentication', 'rest_framework/views.py', 'perform_authentication'),
+    ('permissions', 'rest_framework/views.py', 'check_permissions'),
+    ('filtering', 'rest_framework/generics.py', 'filter_queryset'),
+    ('pagination', 'rest_framework/generics.py', 'paginate_queryset'),
+    ('serialization', 'rest_framework/serializers.py', 'data'),
+    ('serialization', 'api/projections.py', 'represent'),
+    ('serialization', 'api/snapshots.py', 'represent_snapshot'),
+    ('rendering', 'rest_framework/response.py', 'rendered_content'),
+    ('database', 'django/db/backends/utils.py', '_execute'),
+)
+
+
+def get_mode(request):
+    """
+    Возвращает режим профилирования из заголовка X-Profile или
+    параметра _profile, либо None, если профилирование не запрошено.
+    """
+    return (
+        request.META.get(PROFILE_HEADER)
+        or request.GET.get(PROFILE_PARAM)
+        or None
+    )
+
+
+def is_staff(request):
+    """
+    Проверяет, что запрос сделан сотрудником: по сессии или по
+    аутентификации API, которая выполняется только в этом случае.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        try:
+            result = authentication_class().authenticate(request)
+        except APIException:
+            return False
+        if result is not None:
+            return result[0].is_staff
+    return False
+
+
+def get_phases(stats):
+    """
+    Возвращает суммарное время фаз обработки запроса в миллисекундах.
+
+    Для вложенных вызовов одной фазы берётся наибольшее время,
+    чтобы не считать их дважды.
+    """
+    phases = {}
+    for (filename, _, name), row in stats.stats.items():
+        cumulative = row[3]
+        for phase, suffix, function in PHASES:
+            if name == function and filename.endswith(suffix):
+                phases[phase] = max(phases.get(phase, 0), cumulative * 1000)
+    phases['total'] = stats.total_tt * 1000
+    return phases
+
+
+def save_profile(profiler, request):
+    """
+    Сохраняет pstats в PROFILING_DIR и удаляет старые файлы сверх
+    PROFILING_MAX_FILES. Возвращает имя файла или None.
+    """
+    slug = re.sub(r'[^\w]+', '-', request.path).strip('-')
+    name = (
+        f'{time.strftime("%Y%m%d-%H%M%S")}-{uuid.uuid4().hex[:8]}-'
+        f'{request.method}-{slug}.prof'
+    )
+    try:
+        os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+        profiler.dump_stats(os.path.join(settings.PROFILING_DIR, name))
+        files = sorted(
+            entry for entry in os.listdir(settings.PROFILING_DIR)
+            if entry.endswith('.prof')
+        )
+        for old in files[:-settings.PROFILING_MAX_FILES]:
+            os.remove(os.path.join(settings.PROFILING_DIR, old))
+    except OSError:
+        logger.exception('Failed to save profile')
+        return None
+    return name
+
+
+def format_stats(stats):
+    """Возвращает текстовый отчёт по самым долгим вызовам."""
+    stream = io.StringIO()
+    stats.stream = stream
+    stats.sort_stats('cumulative').print_stats(PROFILE_TEXT_LINES)
+    return stream.getvalue()
+
+
+def profile(get_response, request):
+    """Выполняет запрос под cProfile и возвращает ответ и статистику."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    return response, profiler, pstats.Stats(profiler)
@@ -0,0 +1,71 @@
+import itertools
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReplicaPool:
+    """
+    Выбирает реплику по кругу, пропуская недоступные.
+
+    Реплика, к которой не удалось подключиться, исключается из выбора
+    на REPLICA_RETRY_SECONDS секунд.
+    """
+
+    def __init__(self, aliases):
+        self.aliases = tuple(aliases)
+        self.cycle = itertools.cycle(self.aliases)
+        self.down_until = {}
+        self.lock = threading.Lock()
+
+    def is_healthy(self, alias):
+        if self.down_until.get(alias, 0) > time.monotonic():
+            return False
+        connection = connections[alias]
+        if connection.connection is not None:
+            return True
+        try:
+            connection.ensure_connection()
+        except DatabaseError:
+            self.down_until[alias] = (
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            )
+            return False
+        return True
+
+    def choose(self):
+        for _ in range(len(self.aliases)):
+            with self.lock:
+                alias = next(self.cycle)
+            if self.is_healthy(alias):
+                return alias
+        return None
+
+
+class ReplicaRouter:
+    """
+    Направляет чтение на реплики, если запрос помечен как безопасный
+    для чтения с реплики, а запись - всегда на основную базу.
+    """
+
+    def __init__(self):
+        self.pool = ReplicaPool(settings.DATABASE_REPLICAS)
+
+    def db_for_read(self, model, **hints):
+        if self.pool.aliases and read_from_replica.get():
+            return self.pool.choose() or 'default'
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return True
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import re
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import DatabaseError, close_old_connections, connections
+from django.dispatch import receiver
+
+from . import constants, metrics
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+slow_queries = ContextVar('slow_queries', default=None)
+pending_slow_queries = ContextVar('pending_slow_queries', default=None)
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bIN \((?:\?, )*\?\)'), 'IN (...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+# Токены, адреса почты и хеши паролей не сохраняются ни в параметрах,
+# ни в планах, где PostgreSQL повторяет значения условий.
+REDACT = re.compile(
+    r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+'
+    r'|\b[0-9a-f]{40}\b'
+    r'|\b(?:pbkdf2_sha256|pbkdf2_sha1|argon2|bcrypt_sha256|bcrypt|scrypt)'
+    r'\$[\w$+/=.,-]+'
+)
+REDACTED = '***'
+
+
+def normalize(sql):
+    """Заменяет литералы и параметры в SQL на плейсхолдеры."""
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def redact(text):
+    """Заменяет токены, адреса почты и хеши паролей в тексте."""
+    return REDACT.sub(REDACTED, text)
+
+
+def fingerprint(sql):
+    """Возвращает нормализованный SQL и его отпечаток."""
+    normalized = normalize(sql)
+    return normalized, hashlib.sha1(normalized.encode()).hexdigest()
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    """Запоминает запросы, выполнявшиеся дольше SLOW_QUERY_THRESHOLD."""
+    buffer = slow_queries.get()
+    if buffer is None or many:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= settings.SLOW_QUERY_THRESHOLD:
+            buffer.append(
+                (context['connection'].alias, sql, params, duration)
+            )
+
+
+def explain(alias, sql, params):
+    """
+    Возвращает план выполнения запроса: EXPLAIN QUERY PLAN в SQLite,
+    EXPLAIN (или EXPLAIN ANALYZE) в PostgreSQL.
+    """
+    connection = connections[alias]
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    elif connection.vendor == 'postgresql':
+        prefix = (
+            'EXPLAIN (ANALYZE, BUFFERS) '
+            if settings.SLOW_QUERY_EXPLAIN_ANALYZE else 'EXPLAIN '
+        )
+    else:
+        return ''
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except DatabaseError as error:
+        return f'EXPLAIN failed: {error}'
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def save_slow_queries(queries, view):
+    """
+    Сохраняет медленные запросы с планами, объясняя каждый отпечаток
+    один раз, и удаляет записи сверх SLOW_QUERY_MAX_ROWS.
+    Параметры и планы сохраняются без чувствительных значений.
+    """
+    objs = {}
+    for alias, sql, params, duration in queries:
+        metrics.increment(f'db.{alias}.slow_queries')
+        normalized, digest = fingerprint(sql)
+        if digest in objs and objs[digest].duration >= duration:
+            continue
+        objs[digest] = SlowQuery(
+            fingerprint=digest,
+            sql=normalized,
+            params=redact(repr(params))[:constants.SLOW_QUERY_PARAMS_LEN],
+            duration=duration,
+            database=alias,
+            view=view[:constants.SLOW_QUERY_VIEW_LEN],
+            plan=redact(
+                explain(alias, sql, params)
+                if sql.lstrip()[:6].upper() == 'SELECT' else ''
+            )
+        )
+    try:
+        SlowQuery.objects.bulk_create(objs.values())
+        # bulk_create в SQLite не возвращает id, поэтому граница
+        # берётся из базы по индексу первичного ключа.
+        boundary = SlowQuery.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[settings.SLOW_QUERY_MAX_ROWS:].first()
+        if boundary is not None:
+            SlowQuery.objects.filter(id__lte=boundary).delete()
+    except DatabaseError:
+        logger.exception('Failed to save slow queries')
+
+
+@receiver(request_finished)
+def save_pending_slow_queries(sender, **kwargs):
+    """
+    Сохраняет медленные запросы, отложенные SlowQueryMiddleware, когда
+    сервер закрывает ответ после отправки тела клиенту.
+
+    Обработчик close_old_connections уже отработал, поэтому открытое
+    здесь соединение закрывается по тем же правилам.
+    """
+    pending = pending_slow_queries.get()
+    if pending is None:
+        return
+    pending_slow_queries.set(None)
+    save_slow_queries(*pending)
+    close_old_connections()
@@ -0,0 +1,179 @@
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import constants, metrics
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, max_attempts=constants.TASK_MAX_ATTEMPTS):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    Добавляет методы delay(*args, **kwargs) для постановки в очередь и
+    schedule(run_at, *args, **kwargs) для отложенного запуска.
+    Аргументы должны сериализоваться в JSON.
+    """
+    if func is None:
+        return lambda func: task(func, max_attempts=max_attempts)
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+
+    def schedule(run_at, *args, **kwargs):
+        if settings.TASKS_EAGER:
+            transaction.on_commit(lambda: func(*args, **kwargs))
+            return None
+        return Task.objects.create(
+            name=name, args=list(args), kwargs=kwargs,
+            run_at=run_at, max_attempts=max_attempts
+        )
+
+    wrapper.delay = lambda *args, **kwargs: schedule(
+        timezone.now(), *args, **kwargs
+    )
+    wrapper.schedule = schedule
+    wrapper.task_name = name
+    registry[name] = func
+    return wrapper
+
+
+def claim(worker, limit):
+    """
+    Забирает до limit готовых к запуску задач.
+
+    В PostgreSQL строки блокируются SELECT ... FOR UPDATE SKIP LOCKED,
+    в остальных базах задача забирается условным UPDATE по статусу,
+    который выполнится только у одного воркера.
+    """
+    now = timezone.now()
+    ready = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now
+    ).order_by('run_at', 'id')
+    claimed = {
+        'status': Task.RUNNING,
+        'locked_by': worker,
+        'locked_at': now,
+        'attempts': F('attempts') + 1,
+    }
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(
+                skip_locked=True
+            ).values_list('id', flat=True)[:limit])
+            Task.objects.filter(id__in=ids).update(**claimed)
+    else:
+        ids = [
+            task_id
+            for task_id in ready.values_list('id', flat=True)[:limit]
+            if Task.objects.filter(
+                id=task_id, status=Task.PENDING
+            ).update(**claimed)
+        ]
+    return list(Task.objects.filter(id__in=ids).order_by('run_at', 'id'))
+
+
+def renew_lease(task_obj, stop):
+    """
+    Обновляет locked_at выполняющейся задачи TASK_LEASE_RENEWALS раз
+    за TASK_LOCK_TIMEOUT, пока не установлен stop, чтобы requeue_stale
+    не вернул в очередь долгую задачу живого воркера.
+    """
+    interval = settings.TASK_LOCK_TIMEOUT / constants.TASK_LEASE_RENEWALS
+    try:
+        while not stop.wait(interval):
+            Task.objects.filter(
+                id=task_obj.id, status=Task.RUNNING,
+                locked_by=task_obj.locked_by
+            ).update(locked_at=timezone.now())
+    finally:
+        connection.close()
+
+
+@contextmanager
+def lease(task_obj):
+    """Продлевает блокировку задачи на время выполнения блока."""
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=renew_lease, args=(task_obj, stop), daemon=True
+    )
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def run(task_obj):
+    """
+    Выполняет задачу и сохраняет результат.
+
+    Пока задача выполняется, её блокировка продлевается в отдельном
+    потоке. При ошибке задача возвращается в очередь с экспоненциальной
+    задержкой TASK_RETRY_DELAY * 2 ** (попытка - 1), пока не исчерпаны
+    попытки.
+    """
+    func = registry.get(task_obj.name)
+    try:
+        if func is None:
+            raise LookupError(f'Unknown task {task_obj.name}')
+        with lease(task_obj):
+            func(*task_obj.args, **task_obj.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if task_obj.attempts < task_obj.max_attempts:
+            delay = settings.TASK_RETRY_DELAY * 2 ** (task_obj.attempts - 1)
+            status = Task.PENDING
+            run_at = timezone.now() + timedelta(seconds=delay)
+            metrics.increment(f'tasks.{task_obj.name}.retried')
+        else:
+            status = Task.FAILED
+            run_at = task_obj.run_at
+            metrics.increment(f'tasks.{task_obj.name}.failed')
+            logger.error('Task %s failed: %s', task_obj.id, error)
+        Task.objects.filter(id=task_obj.id).update(
+            status=status, run_at=run_at, last_error=error,
+            locked_by='', locked_at=None, updated=timezone.now()
+        )
+        return False
+    Task.objects.filter(id=task_obj.id).update(
+        status=Task.DONE, locked_by='', locked_at=None,
+        updated=timezone.now()
+    )
+    metrics.increment(f'tasks.{task_obj.name}.done')
+    return True
+
+
+def requeue_stale():
+    """
+    Возвращает в очередь задачи упавших воркеров, не продлевавших
+    блокировку дольше TASK_LOCK_TIMEOUT секунд, и удаляет
+    выполненные задачи старше TASK_KEEP_DONE секунд.
+    """
+    now = timezone.now()
+    requeued = Task.objects.filter(
+        status=Task.RUNNING,
+        locked_at__lt=now - timedelta(seconds=settings.TASK_LOCK_TIMEOUT)
+    ).update(
+        status=Task.PENDING, locked_by='', locked_at=None, updated=now
+    )
+    Task.objects.filter(
+        status=Task.DONE,
+        updated__lt=now - timedelta(seconds=settings.TASK_KEEP_DONE)
+    ).delete()
+    return requeued
@@ -31,6 +31,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.MemoryMiddleware',
+    'core.middleware.ProfilingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaMiddleware',
+    'core.middleware.SlowQueryMiddleware',
+    'core.middleware.StatementTimeoutMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -69,7 +75,8 @@ if os.getenv('DB_POSTGRES', False) == 'True':
             'USER': os.getenv('POSTGRES_USER', 'some_user'),
             'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
             'HOST': os.getenv('DB_HOST', ''),
-            'PORT': os.getenv('DB_PORT', 5432)
+            'PORT': os.getenv('DB_PORT', 5432),
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
         }
     }
 else:
@@ -77,9 +84,63 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+            # Файловая база для тестов: в памяти SQLite не ждёт
+            # блокировку и параллельные записи падают.
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
         }
     }
 
+DB_HEALTH_CHECK_INTERVAL = int(os.getenv('DB_HEALTH_CHECK_INTERVAL', 10))
+
+STATEMENT_TIMEOUTS = {
+    'default': int(os.getenv('DB_STATEMENT_TIMEOUT', 5000)),
+    'list': 2000,
+    'retrieve': 2000,
+    'download_shopping_cart': 30000,
+}
+
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', 'True') == 'True'
+
+SLOW_QUERY_THRESHOLD = float(os.getenv('SLOW_QUERY_THRESHOLD', 200))
+
+SLOW_QUERY_EXPLAIN_ANALYZE = (
+    os.getenv('SLOW_QUERY_EXPLAIN_ANALYZE', False) == 'True'
+)
+
+SLOW_QUERY_MAX_ROWS = int(os.getenv('SLOW_QUERY_MAX_ROWS', 10000))
+
+DATABASE_REPLICAS = []
+
+if os.getenv('DB_REPLICA_HOSTS'):
+    for number, host in enumerate(
+        os.getenv('DB_REPLICA_HOSTS').split(':'), start=1
+    ):
+        DATABASES[f'replica_{number}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'TEST': {'MIRROR': 'default'},
+        }
+        DATABASE_REPLICAS.append(f'replica_{number}')
+
+if os.getenv('DB_SQLITE_REPLICA'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DB_SQLITE_REPLICA'),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+REPLICA_READ_PATHS = (
+    '/api/recipes/', '/api/tags/', '/api/ingredients/', '/api/users/'
+)
+
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+REPLICA_RETRY_SECONDS = int(os.getenv('REPLICA_RETRY_SECONDS', 30))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -115,17 +176,109 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = '/app/media/'
 
+SHOPPING_LIST_ACCEL = os.getenv('SHOPPING_LIST_ACCEL', False) == 'True'
+
+MEMORY_TRACKING = os.getenv('MEMORY_TRACKING', 'True') == 'True'
+
+MEMORY_LOG_THRESHOLD = int(os.getenv('MEMORY_LOG_THRESHOLD', 8192))
+
+MEMORY_RECYCLE_RSS = int(os.getenv('MEMORY_RECYCLE_RSS', 512))
+
+MEMORY_TRACEMALLOC_FRAMES = int(os.getenv('MEMORY_TRACEMALLOC_FRAMES', 0))
+
+MEMORY_SNAPSHOT_INTERVAL = int(os.getenv('MEMORY_SNAPSHOT_INTERVAL', 100))
+
+MEMORY_SNAPSHOT_TOP = int(os.getenv('MEMORY_SNAPSHOT_TOP', 10))
+
+PRELOAD_MODULES = (
+    'PIL.BmpImagePlugin',
+    'PIL.GifImagePlugin',
+    'PIL.JpegImagePlugin',
+    'PIL.PngImagePlugin',
+    'PIL.PpmImagePlugin',
+)
+
+PROFILING_DIR = os.getenv('PROFILING_DIR', '/app/profiles/')
+
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 100))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+COMPRESSION_MIN_LENGTH = int(os.getenv('COMPRESSION_MIN_LENGTH', 1024))
+
+COMPRESSION_SKIP_TYPES = (
+    'application/zip', 'application/gzip', 'application/octet-stream'
+)
+
+COMPRESSION_EXTENSIONS = (
+    '.css', '.js', '.html', '.json', '.map', '.svg', '.txt', '.xml', '.yml'
+)
+
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'foodgram'),
+    }
+}
+
+# Блокировка пересчёта в core.cache.get_or_compute действует между
+# воркерами только с общим кешем; LocMemCache у каждого процесса свой.
+if os.getenv('CACHE_MEMCACHED_HOSTS'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.getenv('CACHE_MEMCACHED_HOSTS').split(','),
+        'KEY_PREFIX': 'foodgram',
+    }
+
+if CACHES['default']['BACKEND'].endswith('LocMemCache'):
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', 10000))
+    }
+
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+CHANGE_EVENT_BACKEND = os.getenv(
+    'CHANGE_EVENT_BACKEND', 'core.events.OutboxPollingBackend'
+)
+
+CHANGE_EVENT_POLL_INTERVAL = float(
+    os.getenv('CHANGE_EVENT_POLL_INTERVAL', 1)
+)
+
+# Только модели, на события которых подписаны обработчики шины.
+CHANGE_EVENT_MODELS = (
+    'recipes.Recipe',
+    'recipes.Tag',
+    'recipes.Ingredient',
+    'users.CustomUser',
+    'authtoken.Token',
+)
+
+CHANGE_EVENT_KEEP = int(os.getenv('CHANGE_EVENT_KEEP', 86400))
+
+TASKS_EAGER = os.getenv('TASKS_EAGER', False) == 'True'
+
+TASK_RETRY_DELAY = int(os.getenv('TASK_RETRY_DELAY', 10))
+
+TASK_LOCK_TIMEOUT = int(os.getenv('TASK_LOCK_TIMEOUT', 600))
+
+TASK_KEEP_DONE = int(os.getenv('TASK_KEEP_DONE', 86400))
+
 DJOSER = {
     'HIDE_USERS': False,
     'LOGIN_FIELD': 'email',
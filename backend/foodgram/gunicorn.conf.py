@@ -0,0 +1,25 @@
+import os
+
+bind = '0.0.0.0:8000'
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 0))
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+
+def when_ready(server):
+    """Готовит приложение в мастер-процессе до запуска воркеров."""
+    if server.cfg.preload_app:
+        from core.preload import warm_up
+
+        warm_up()
+
+
+def post_request(worker, req, environ, resp):
+    """Завершает воркер после ответа, если он превысил лимит памяти."""
+    from core.memory import should_recycle
+
+    if should_recycle():
+        worker.log.info('Worker %s exceeded memory limit, recycling',
+                        worker.pid)
+        worker.alive = False
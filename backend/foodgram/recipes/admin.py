@@ -1,19 +1,37 @@
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 
-from .models import (Favorite, Ingredient, Recipe, RecipeIngredient, RecipeTag,
-                     ShoppingCart, Tag)
+from core.admin import DeferredDeletionMixin
+from core.constants import ADMIN_LIST_PER_PAGE
+from core.paginators import EstimatedCountPaginator
+
+from .models import (Favorite, Ingredient, Nutrient, Recipe, RecipeIngredient,
+                     RecipeTag, ShoppingCart, Tag)
+from .nutrition import refresh_recipe_nutrition
+from .shopping import bump_cart_version
+from .tasks import refresh_nutrients
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Базовая админка для больших таблиц."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = ADMIN_LIST_PER_PAGE
 
 
 class IngredientInline(admin.TabularInline):
     model = RecipeIngredient
     extra = 0
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
 class TagInline(admin.TabularInline):
     model = RecipeTag
     extra = 0
     min_num = 1
+    autocomplete_fields = ('tag',)
 
 
 @admin.register(Tag)
@@ -22,25 +40,48 @@ class TagAdmin(admin.ModelAdmin):
         'name',
         'slug'
     )
+    search_fields = ('name', 'slug')
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(DeferredDeletionMixin, LargeTableAdmin):
     list_display = (
-        'name',
-        'author'
-    )
-    list_filter = (
         'name',
         'author',
-        'tags'
+        'in_favorites',
+        'is_active'
+    )
+    list_filter = ('is_active', 'tags')
+    list_select_related = ('author',)
+    search_fields = ('name', 'author__username')
+    autocomplete_fields = ('author',)
+    readonly_fields = (
+        'in_favorites', 'calories', 'proteins', 'fats', 'carbohydrates'
     )
-    readonly_fields = ('in_favorites',)
     inlines = (IngredientInline, TagInline)
 
+    def save_related(self, request, form, formsets, change):
+        """Пересчитывает пищевую ценность после сохранения ингредиентов."""
+        super().save_related(request, form, formsets, change)
+        refresh_recipe_nutrition(form.instance)
+
+    def get_queryset(self, request):
+        """
+        Добавляет число добавлений в избранное коррелированным
+        подзапросом, который считается только для строк страницы.
+        """
+        favorites = Favorite.objects.filter(
+            recipe=OuterRef('pk')
+        ).order_by().values('recipe').annotate(
+            count=Count('id')
+        ).values('count')
+        return super().get_queryset(request).annotate(
+            favorites_count=Coalesce(Subquery(favorites), 0)
+        )
+
     @admin.display(description='Число добавлений в избранное')
     def in_favorites(self, instance):
-        return instance.favorited.count()
+        return instance.favorites_count
 
 
 @admin.register(Ingredient)
@@ -49,20 +90,69 @@ class IngredientAdmin(admin.ModelAdmin):
         'name',
         'measurement_unit'
     )
-    list_filter = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(Nutrient)
+class NutrientAdmin(admin.ModelAdmin):
+    list_display = (
+        'ingredient',
+        'per',
+        'calories',
+        'proteins',
+        'fats',
+        'carbohydrates'
+    )
+    list_select_related = ('ingredient',)
+    search_fields = ('ingredient__name',)
+    autocomplete_fields = ('ingredient',)
+
+    def save_model(self, request, obj, form, change):
+        """Ставит в очередь пересчёт рецептов с этим ингредиентом."""
+        super().save_model(request, obj, form, change)
+        refresh_nutrients.delay([obj.ingredient_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_nutrients.delay([obj.ingredient_id])
+
+    def delete_queryset(self, request, queryset):
+        ingredient_ids = list(queryset.values_list('ingredient_id', flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_nutrients.delay(ingredient_ids)
 
 
 @admin.register(Favorite)
-class FavoriteAdmin(admin.ModelAdmin):
+class FavoriteAdmin(LargeTableAdmin):
     list_display = (
         'owner',
         'recipe'
     )
+    list_select_related = ('owner', 'recipe')
+    autocomplete_fields = ('owner', 'recipe')
 
 
 @admin.register(ShoppingCart)
-class ShoppingCartAdmin(admin.ModelAdmin):
+class ShoppingCartAdmin(LargeTableAdmin):
     list_display = (
         'owner',
-        'recipe'
+        'recipe',
+        'servings'
     )
+    list_select_related = ('owner', 'recipe')
+    autocomplete_fields = ('owner', 'recipe')
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        bump_cart_version(
+            pk__in={obj.owner_id, form.initial.get('owner', obj.owner_id)}
+        )
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        bump_cart_version(pk=obj.owner_id)
+
+    def delete_queryset(self, request, queryset):
+        owners = set(queryset.values_list('owner_id', flat=True))
+        super().delete_queryset(request, queryset)
+        bump_cart_version(pk__in=owners)
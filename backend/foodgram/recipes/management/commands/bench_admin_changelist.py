@@ -0,0 +1,71 @@
+import time
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Favorite, Recipe, ShoppingCart, User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Measure admin changelist render time on large tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def seed(self, count, owner):
+        """Создаёт временные рецепты, избранное и покупки."""
+        Recipe.objects.bulk_create((
+            Recipe(
+                author=owner, name=f'Рецепт {index}', text='Текст',
+                image='recipes/bench.png', cooking_time=10
+            ) for index in range(count)
+        ), batch_size=1000)
+        recipe_ids = Recipe.objects.order_by('-id').values_list(
+            'id', flat=True
+        )[:count]
+        for model in (Favorite, ShoppingCart):
+            model.objects.bulk_create((
+                model(owner=owner, recipe_id=recipe_id)
+                for recipe_id in recipe_ids.iterator()
+            ), batch_size=1000, ignore_conflicts=True)
+
+    def benchmark(self, user, repeat):
+        factory = RequestFactory()
+        for model in (Recipe, Favorite, ShoppingCart):
+            model_admin = admin.site._registry[model]
+            request = factory.get('/admin/')
+            request.user = user
+            with CaptureQueriesContext(connection) as queries:
+                model_admin.changelist_view(request).render()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                model_admin.changelist_view(request).render()
+            elapsed = (time.perf_counter() - started) / repeat
+            self.stdout.write(
+                f'{model._meta.model_name:<16} '
+                f'{model.objects.count():>10} rows '
+                f'{elapsed * 1000:>10.1f} ms '
+                f'{len(queries):>5} queries'
+            )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = User.objects.create_superuser(
+                    username='bench-admin', email='bench-admin@example.com',
+                    password='bench', first_name='Bench', last_name='Admin'
+                )
+                if options['seed']:
+                    self.seed(options['seed'], user)
+                self.benchmark(user, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from core import constants
+from recipes.similarity import rebuild_similar_recipes
+
+
+class Command(BaseCommand):
+    help = 'Rebuild precomputed similar recipes lists'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k', type=int, default=constants.SIMILAR_RECIPES_TOP_K
+        )
+        parser.add_argument(
+            '--metric', choices=constants.SIMILARITY_METRICS,
+            default='cosine'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_similar_recipes(
+            top=options['top_k'], metric=options['metric']
+        )
+        self.stdout.write(f'Saved {count} similar recipes pairs')
@@ -0,0 +1,56 @@
+import csv
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes.models import Ingredient, Nutrient
+from recipes.nutrition import NUTRIENT_FIELDS, refresh_ingredient_nutrition
+
+
+class Command(BaseCommand):
+    help = 'Import ingredient nutrients from CSV or JSON and update recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='nutrients.csv')
+
+    def read(self, path):
+        with open(path, encoding='utf-8') as file:
+            if path.endswith('.json'):
+                return json.load(file)
+            return list(csv.DictReader(file))
+
+    def handle(self, *args, **options):
+        try:
+            items = self.read(options['path'])
+        except (OSError, ValueError) as error:
+            raise CommandError(error)
+        ingredients = {
+            (name, unit): ingredient_id
+            for ingredient_id, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            )
+        }
+        objs = {}
+        for item in items:
+            ingredient_id = ingredients.get(
+                (item['name'], item['measurement_unit'])
+            )
+            if ingredient_id is None:
+                self.stderr.write(
+                    f'Unknown ingredient {item["name"]} '
+                    f'({item["measurement_unit"]})'
+                )
+                continue
+            objs[ingredient_id] = Nutrient(
+                ingredient_id=ingredient_id,
+                per=int(item.get('per') or Nutrient.per.field.default),
+                **{field: float(item[field]) for field in NUTRIENT_FIELDS}
+            )
+        with transaction.atomic():
+            Nutrient.objects.filter(ingredient_id__in=objs).delete()
+            Nutrient.objects.bulk_create(objs.values())
+            recipe_ids = refresh_ingredient_nutrition(list(objs))
+        self.stdout.write(
+            f'Loaded {len(objs)} nutrients, updated {len(recipe_ids)} recipes'
+        )
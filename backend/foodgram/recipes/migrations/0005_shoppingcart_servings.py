@@ -0,0 +1,19 @@
+# Generated by Django 3.2 on 2026-10-19 08:56
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_similarrecipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shoppingcart',
+            name='servings',
+            field=models.PositiveSmallIntegerField(default=1, validators=[django.core.validators.MinValueValidator(1, message='Число порций не может быть меньше 1'), django.core.validators.MaxValueValidator(100, message='Число порций не может быть больше 100')], verbose_name='Число порций'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-19 09:16
+
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def mark_snapshots_stale(apps, schema_editor):
+    apps.get_model('recipes', 'RecipeSnapshot').objects.update(stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipesnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Nutrient',
+            fields=[
+                ('ingredient', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='nutrient', serialize=False, to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('per', models.PositiveSmallIntegerField(default=100, validators=[django.core.validators.MinValueValidator(1)], verbose_name='На количество')),
+                ('calories', models.FloatField(verbose_name='Калорийность, ккал')),
+                ('proteins', models.FloatField(verbose_name='Белки, г')),
+                ('fats', models.FloatField(verbose_name='Жиры, г')),
+                ('carbohydrates', models.FloatField(verbose_name='Углеводы, г')),
+            ],
+            options={
+                'verbose_name': 'Пищевая ценность',
+                'verbose_name_plural': 'Пищевая ценность',
+            },
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='calories',
+            field=models.FloatField(db_index=True, default=0, verbose_name='Калорийность, ккал'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(default=0, verbose_name='Углеводы, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(default=0, verbose_name='Жиры, г'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(default=0, verbose_name='Белки, г'),
+        ),
+        migrations.RunPython(
+            mark_snapshots_stale, migrations.RunPython.noop
+        ),
+    ]
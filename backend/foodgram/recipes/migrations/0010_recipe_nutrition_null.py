@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+def clear_missing_nutrition(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    recipes = Recipe.objects.exclude(
+        amount_ingredient__ingredient__nutrient__isnull=False
+    )
+    recipes.update(calories=None, proteins=None, fats=None, carbohydrates=None)
+    apps.get_model('recipes', 'RecipeSnapshot').objects.filter(
+        recipe__in=recipes
+    ).update(stale=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_updated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='calories',
+            field=models.FloatField(blank=True, db_index=True, null=True, verbose_name='Калорийность, ккал'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='carbohydrates',
+            field=models.FloatField(blank=True, null=True, verbose_name='Углеводы, г'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='fats',
+            field=models.FloatField(blank=True, null=True, verbose_name='Жиры, г'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='proteins',
+            field=models.FloatField(blank=True, null=True, verbose_name='Белки, г'),
+        ),
+        migrations.RunPython(
+            clear_missing_nutrition, migrations.RunPython.noop
+        ),
+    ]
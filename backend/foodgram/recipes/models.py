@@ -56,6 +56,38 @@ class Ingredient(models.Model):
         return self.name[:constants.SLICE_LEN]
 
 
+class Nutrient(models.Model):
+    """
+    Модель пищевой ценности ингредиента.
+
+    Значения указаны на per базовых единиц ингредиента: граммов или
+    миллилитров для переводимых единиц, иначе на единицы измерения.
+    """
+    ingredient = models.OneToOneField(
+        Ingredient,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='nutrient',
+        verbose_name='Ингредиент'
+    )
+    per = models.PositiveSmallIntegerField(
+        default=constants.NUTRIENT_PER,
+        validators=[MinValueValidator(1)],
+        verbose_name='На количество'
+    )
+    calories = models.FloatField(verbose_name='Калорийность, ккал')
+    proteins = models.FloatField(verbose_name='Белки, г')
+    fats = models.FloatField(verbose_name='Жиры, г')
+    carbohydrates = models.FloatField(verbose_name='Углеводы, г')
+
+    class Meta:
+        verbose_name = 'Пищевая ценность'
+        verbose_name_plural = 'Пищевая ценность'
+
+    def __str__(self):
+        return f'{self.ingredient} {self.calories} ккал'
+
+
 class Recipe(models.Model):
     """Модель рецептов."""
     tags = models.ManyToManyField(
@@ -103,6 +135,28 @@ class Recipe(models.Model):
         ]
     )
 
+    calories = models.FloatField(
+        null=True,
+        blank=True,
+        db_index=True,
+        verbose_name='Калорийность, ккал'
+    )
+    proteins = models.FloatField(
+        null=True, blank=True, verbose_name='Белки, г'
+    )
+    fats = models.FloatField(null=True, blank=True, verbose_name='Жиры, г')
+    carbohydrates = models.FloatField(
+        null=True, blank=True, verbose_name='Углеводы, г'
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name='Активен'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменён'
+    )
+
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
@@ -192,6 +246,26 @@ class OwnerRecipeBaseModel(models.Model):
 
 class ShoppingCart(OwnerRecipeBaseModel):
     """Модель списка покупок."""
+    servings = models.PositiveSmallIntegerField(
+        default=constants.SERVINGS_MIN,
+        verbose_name='Число порций',
+        validators=[
+            MinValueValidator(
+                constants.SERVINGS_MIN,
+                message=(
+                    'Число порций не может быть меньше '
+                    f'{constants.SERVINGS_MIN}'
+                )
+            ),
+            MaxValueValidator(
+                constants.SERVINGS_MAX,
+                message=(
+                    'Число порций не может быть больше '
+                    f'{constants.SERVINGS_MAX}'
+                )
+            )
+        ]
+    )
 
     class Meta(OwnerRecipeBaseModel.Meta):
         verbose_name = 'Список покупок'
@@ -212,3 +286,64 @@ class Favorite(OwnerRecipeBaseModel):
 
     def __str__(self):
         return (f'Рецепт в избранном {self.id}')
+
+
+class SimilarRecipe(models.Model):
+    """Модель предрассчитанных похожих рецептов."""
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_from',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar_to',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('-score',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe', 'similar'], name='unique_similar_recipe'
+            )
+        ]
+
+    def __str__(self):
+        return (f'Похожий рецепт {self.id}')
+
+
+class RecipeSnapshot(models.Model):
+    """Модель сохранённого представления рецепта для чтения."""
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='snapshot',
+        verbose_name='Рецепт'
+    )
+    version = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Версия'
+    )
+    document = models.JSONField(verbose_name='Документ')
+    stale = models.BooleanField(
+        default=False,
+        verbose_name='Требует обновления'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Обновлено'
+    )
+
+    class Meta:
+        verbose_name = 'Снимок рецепта'
+        verbose_name_plural = 'Снимки рецептов'
+
+    def __str__(self):
+        return (f'Снимок рецепта {self.recipe_id} v{self.version}')
@@ -0,0 +1,111 @@
+import numpy as np
+from django.utils import timezone
+
+from core import constants
+from core.events import bus
+from core.models import ChangeEvent
+
+from .models import Recipe, RecipeIngredient, RecipeSnapshot
+
+NUTRIENT_FIELDS = ('calories', 'proteins', 'fats', 'carbohydrates')
+
+
+def compute_nutrition(recipe_ids):
+    """
+    Считает пищевую ценность рецептов по таблице Nutrient.
+
+    Количество ингредиента переводится в базовую единицу по
+    UNIT_CONVERSIONS и делится на количество, к которому относятся
+    значения ингредиента. Возвращает словарь кортежей по id рецепта;
+    ингредиенты без данных о пищевой ценности не учитываются, а у
+    рецепта без таких ингредиентов все значения равны None.
+    """
+    recipe_ids = np.unique(np.array(recipe_ids, dtype=np.int64))
+    rows = list(RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids.tolist(),
+        ingredient__nutrient__isnull=False
+    ).values_list(
+        'recipe_id', 'amount', 'ingredient__measurement_unit',
+        'ingredient__nutrient__per',
+        *(f'ingredient__nutrient__{field}' for field in NUTRIENT_FIELDS)
+    ))
+    totals = np.zeros((len(recipe_ids), len(NUTRIENT_FIELDS)))
+    known = np.zeros(len(recipe_ids), dtype=bool)
+    if rows:
+        recipes, amounts, units, per, *values = zip(*rows)
+        factors = np.array([
+            constants.UNIT_CONVERSIONS.get(unit, (unit, 1))[1]
+            for unit in units
+        ], dtype=np.float64)
+        quantity = np.array(amounts, dtype=np.float64) * factors / np.array(
+            per, dtype=np.float64
+        )
+        positions = np.searchsorted(
+            recipe_ids, np.array(recipes, dtype=np.int64)
+        )
+        np.add.at(
+            totals, positions,
+            quantity[:, None] * np.array(values, dtype=np.float64).T
+        )
+        known[positions] = True
+    totals = np.round(totals, constants.NUTRIENT_PRECISION)
+    missing = (None,) * len(NUTRIENT_FIELDS)
+    return {
+        int(recipe_id): (
+            tuple(float(value) for value in row) if has_data else missing
+        )
+        for recipe_id, row, has_data in zip(recipe_ids, totals, known)
+    }
+
+
+def update_nutrition(recipe_ids):
+    """Пересчитывает и сохраняет пищевую ценность рецептов."""
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), constants.NUTRITION_CHUNK_SIZE):
+        nutrition = compute_nutrition(
+            recipe_ids[start:start + constants.NUTRITION_CHUNK_SIZE]
+        )
+        now = timezone.now()
+        recipes = [
+            Recipe(
+                id=recipe_id, updated=now,
+                **dict(zip(NUTRIENT_FIELDS, values))
+            )
+            for recipe_id, values in nutrition.items()
+        ]
+        Recipe.objects.bulk_update(recipes, (*NUTRIENT_FIELDS, 'updated'))
+
+
+def refresh_recipe_nutrition(recipe):
+    """
+    Пересчитывает пищевую ценность одного рецепта и сохраняет её.
+
+    Вызывается сразу после сохранения рецепта, событие и пометка
+    снимка которого уже записаны, поэтому значения пишутся
+    запросом UPDATE без сигналов.
+    """
+    values = dict(zip(
+        NUTRIENT_FIELDS, compute_nutrition([recipe.id])[recipe.id]
+    ))
+    for field, value in values.items():
+        setattr(recipe, field, value)
+    Recipe.objects.filter(pk=recipe.pk).update(
+        updated=timezone.now(), **values
+    )
+
+
+def refresh_ingredient_nutrition(ingredient_ids):
+    """
+    Пересчитывает рецепты с ингредиентами, у которых изменились
+    данные о пищевой ценности, помечает их снимки устаревшими и
+    публикует событие для сброса кеша. Возвращает id рецептов.
+    """
+    recipe_ids = set(RecipeIngredient.objects.filter(
+        ingredient_id__in=ingredient_ids
+    ).values_list('recipe_id', flat=True))
+    update_nutrition(recipe_ids)
+    RecipeSnapshot.objects.filter(
+        recipe_id__in=recipe_ids
+    ).update(stale=True)
+    bus.publish('recipes.nutrient', '*', ChangeEvent.SAVE)
+    return recipe_ids
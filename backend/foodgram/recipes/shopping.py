@@ -0,0 +1,126 @@
+import hashlib
+import hmac
+import os
+import threading
+
+from django.conf import settings
+from django.db.models import (BigIntegerField, Case, CharField, F, Sum, Value,
+                              When)
+from django.db.models.functions import Cast
+
+from core import metrics
+from core.constants import (SHOPPING_LIST_DIGEST_LEN, SHOPPING_LIST_DIR,
+                            UNIT_CONVERSIONS)
+
+from .models import Recipe, RecipeIngredient, ShoppingCart, User
+from .nutrition import NUTRIENT_FIELDS
+
+
+def unit_case(index, output_field, default):
+    """Строит выражение CASE по таблице перевода единиц измерения."""
+    return Case(
+        *[
+            When(
+                ingredient__measurement_unit=unit,
+                then=Value(conversion[index])
+            ) for unit, conversion in UNIT_CONVERSIONS.items()
+        ],
+        default=default,
+        output_field=output_field
+    )
+
+
+def get_shopping_ingredients(owner):
+    """
+    Суммирует ингредиенты из списка покупок одним запросом.
+
+    Совместимые единицы измерения приводятся к базовой, количество
+    умножается на число порций, указанное для рецепта в списке.
+    Множители приводятся к bigint: произведение двух smallint в
+    PostgreSQL остаётся smallint и переполняется.
+    """
+    return RecipeIngredient.objects.filter(
+        recipe__shopping__owner=owner, recipe__is_active=True
+    ).annotate(
+        unit=unit_case(0, CharField(), F('ingredient__measurement_unit'))
+    ).values(
+        'ingredient__name', 'unit'
+    ).annotate(
+        amount=Sum(
+            Cast('amount', BigIntegerField())
+            * Cast('recipe__shopping__servings', BigIntegerField())
+            * unit_case(1, BigIntegerField(), Value(1))
+        )
+    ).order_by('ingredient__name', 'unit')
+
+
+def get_shopping_nutrition(owner):
+    """Суммирует пищевую ценность рецептов списка покупок с порциями."""
+    return Recipe.objects.filter(
+        shopping__owner=owner, is_active=True
+    ).aggregate(**{
+        field: Sum(F(field) * F('shopping__servings'))
+        for field in NUTRIENT_FIELDS
+    })
+
+
+def bump_cart_version(**lookups):
+    """
+    Увеличивает версию списка покупок пользователей, отобранных
+    по lookups. Вызывается при любом изменении, влияющем на файл
+    списка покупок.
+    """
+    return User.objects.filter(**lookups).update(
+        cart_version=F('cart_version') + 1
+    )
+
+
+def get_cart_digest(owner):
+    """
+    Возвращает отпечаток содержимого списка покупок: рецептов,
+    порций и отметок изменения рецептов. Читает только строки
+    списка, а не ингредиенты рецептов.
+    """
+    rows = ShoppingCart.objects.filter(
+        owner=owner, recipe__is_active=True
+    ).order_by('recipe_id').values_list(
+        'recipe_id', 'servings', 'recipe__updated'
+    )
+    payload = repr((owner.first_name, owner.last_name, list(rows)))
+    return hmac.new(
+        settings.SECRET_KEY.encode(), payload.encode(), hashlib.sha256
+    ).hexdigest()[:SHOPPING_LIST_DIGEST_LEN]
+
+
+def get_shopping_list_file(owner, render):
+    """
+    Возвращает путь к файлу списка покупок относительно каталога
+    списков в MEDIA_ROOT.
+
+    Файл создаётся функцией render один раз для каждой версии
+    списка, предыдущие версии файла владельца удаляются. Версия
+    складывается из owner.cart_version и отпечатка содержимого:
+    файл обновится, даже если какой-то путь записи не увеличил
+    cart_version.
+    """
+    name = f'{owner.id}/{owner.cart_version}-{get_cart_digest(owner)}.txt'
+    directory = os.path.join(
+        settings.MEDIA_ROOT, SHOPPING_LIST_DIR, str(owner.id)
+    )
+    path = os.path.join(settings.MEDIA_ROOT, SHOPPING_LIST_DIR, name)
+    if os.path.exists(path):
+        metrics.increment('shopping_list.reused')
+        return name
+    os.makedirs(directory, exist_ok=True)
+    temporary = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        file.write(render())
+    os.replace(temporary, path)
+    metrics.increment('shopping_list.rendered')
+    for old in os.listdir(directory):
+        if old.endswith('.txt') and old != os.path.basename(path):
+            try:
+                os.remove(os.path.join(directory, old))
+            except FileNotFoundError:
+                pass
+    return name
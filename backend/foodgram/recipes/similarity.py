@@ -0,0 +1,201 @@
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+from scipy import sparse
+
+from core import constants
+
+from .models import RecipeIngredient, RecipeTag, SimilarRecipe
+
+
+def get_candidates(recipe):
+    """
+    Возвращает условие отбора рецептов, у которых есть общий
+    ингредиент или тег с recipe: сходство остальных равно нулю.
+    """
+    return Q(recipe_id__in=RecipeIngredient.objects.filter(
+        ingredient_id__in=RecipeIngredient.objects.filter(
+            recipe=recipe
+        ).values('ingredient_id')
+    ).values('recipe_id')) | Q(recipe_id__in=RecipeTag.objects.filter(
+        tag_id__in=RecipeTag.objects.filter(recipe=recipe).values('tag_id')
+    ).values('recipe_id'))
+
+
+def build_matrix(binary=False, condition=Q()):
+    """
+    Строит разреженную матрицу рецепт × (ингредиенты + теги).
+
+    condition ограничивает строки матрицы отобранными рецептами.
+    Возвращает массив id рецептов, соответствующий строкам матрицы,
+    и саму матрицу в формате CSR.
+    """
+    ingredient_pairs = np.array(
+        RecipeIngredient.objects.filter(condition).values_list(
+            'recipe_id', 'ingredient_id'
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    tag_pairs = np.array(
+        RecipeTag.objects.filter(condition).values_list(
+            'recipe_id', 'tag_id'
+        ),
+        dtype=np.int64
+    ).reshape(-1, 2)
+    recipe_ids = np.unique(
+        np.concatenate((ingredient_pairs[:, 0], tag_pairs[:, 0]))
+    )
+    ingredient_ids, ingredient_cols = np.unique(
+        ingredient_pairs[:, 1], return_inverse=True
+    )
+    tag_ids, tag_cols = np.unique(tag_pairs[:, 1], return_inverse=True)
+    rows = np.searchsorted(
+        recipe_ids,
+        np.concatenate((ingredient_pairs[:, 0], tag_pairs[:, 0]))
+    )
+    cols = np.concatenate((ingredient_cols, tag_cols + len(ingredient_ids)))
+    tag_weight = 1.0 if binary else constants.SIMILAR_TAG_WEIGHT
+    data = np.concatenate((
+        np.ones(len(ingredient_pairs)),
+        np.full(len(tag_pairs), tag_weight)
+    ))
+    matrix = sparse.csr_matrix(
+        (data, (rows, cols)),
+        shape=(len(recipe_ids), len(ingredient_ids) + len(tag_ids))
+    )
+    matrix.sum_duplicates()
+    if binary:
+        matrix.data[:] = 1.0
+    return recipe_ids, matrix
+
+
+def similarity(matrix, rows, metric='cosine'):
+    """
+    Считает сходство строк rows со всеми строками матрицы.
+
+    Возвращает плотный массив размером len(rows) × число рецептов.
+    """
+    if metric == 'jaccard':
+        sizes = np.asarray(matrix.sum(axis=1)).ravel()
+        intersection = (matrix[rows] @ matrix.T).toarray()
+        union = sizes[rows][:, None] + sizes[None, :] - intersection
+        return np.divide(
+            intersection, union,
+            out=np.zeros_like(intersection), where=union > 0
+        )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = sparse.diags(1.0 / norms) @ matrix
+    return (normalized[rows] @ normalized.T).toarray()
+
+
+def top_k(scores, rows, k):
+    """Выбирает k ближайших соседей для каждой строки scores."""
+    scores[np.arange(len(rows)), rows] = 0.0
+    k = min(k, scores.shape[1])
+    if not k:
+        return np.empty((len(rows), 0), dtype=np.int64)
+    neighbours = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(
+        -np.take_along_axis(scores, neighbours, axis=1), axis=1
+    )
+    return np.take_along_axis(neighbours, order, axis=1)
+
+
+def rebuild_similar_recipes(top=constants.SIMILAR_RECIPES_TOP_K,
+                            metric='cosine'):
+    """Полностью пересчитывает таблицу похожих рецептов."""
+    recipe_ids, matrix = build_matrix(binary=metric == 'jaccard')
+    objs = []
+    for start in range(0, len(recipe_ids), constants.SIMILARITY_CHUNK_SIZE):
+        rows = np.arange(
+            start,
+            min(start + constants.SIMILARITY_CHUNK_SIZE, len(recipe_ids))
+        )
+        scores = similarity(matrix, rows, metric)
+        neighbours = top_k(scores, rows, top)
+        for row, columns in zip(rows, neighbours):
+            objs.extend(
+                SimilarRecipe(
+                    recipe_id=int(recipe_ids[row]),
+                    similar_id=int(recipe_ids[column]),
+                    score=float(scores[row - start, column])
+                ) for column in columns if scores[row - start, column] > 0
+            )
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        SimilarRecipe.objects.bulk_create(
+            objs, batch_size=constants.SIMILARITY_CHUNK_SIZE
+        )
+    return len(objs)
+
+
+def trim_neighbours(recipe, scores, top):
+    """
+    Добавляет recipe в списки соседей рецептов из scores и обрезает
+    каждый такой список до top лучших записей.
+
+    scores - словарь сходства рецептов с recipe по их id.
+    Возвращает новые записи для вставки.
+    """
+    lists = {recipe_id: [] for recipe_id in scores}
+    for pk, recipe_id, score in SimilarRecipe.objects.filter(
+        recipe_id__in=scores
+    ).values_list('id', 'recipe_id', 'score'):
+        lists[recipe_id].append((score, pk))
+    objs = []
+    dropped = []
+    for recipe_id, neighbours in lists.items():
+        neighbours.append((scores[recipe_id], None))
+        neighbours.sort(key=lambda item: -item[0])
+        dropped.extend(pk for _, pk in neighbours[top:] if pk is not None)
+        if any(pk is None for _, pk in neighbours[:top]):
+            objs.append(SimilarRecipe(
+                recipe_id=recipe_id,
+                similar=recipe,
+                score=scores[recipe_id]
+            ))
+    SimilarRecipe.objects.filter(id__in=dropped).delete()
+    return objs
+
+
+def refresh_similar_recipes(recipe, top=constants.SIMILAR_RECIPES_TOP_K,
+                            metric='cosine'):
+    """
+    Обновляет соседей одного рецепта после его создания или изменения.
+
+    Матрица строится только по рецептам с общими ингредиентами
+    или тегами. Рецепт добавляется в списки соседей этих рецептов,
+    которые затем обрезаются до top; рецепты, потерявшие его из
+    списка, дополняются при полном пересчёте build_similar_recipes.
+    """
+    recipe_ids, matrix = build_matrix(
+        binary=metric == 'jaccard', condition=get_candidates(recipe)
+    )
+    position = np.searchsorted(recipe_ids, recipe.id)
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(similar=recipe).delete()
+        SimilarRecipe.objects.filter(recipe=recipe).delete()
+        if (
+            position == len(recipe_ids)
+            or recipe_ids[position] != recipe.id
+        ):
+            return
+        rows = np.array([position])
+        scores = similarity(matrix, rows, metric)
+        neighbours = top_k(scores, rows, top)[0]
+        scores = scores[0]
+        objs = [
+            SimilarRecipe(
+                recipe=recipe,
+                similar_id=int(recipe_ids[column]),
+                score=float(scores[column])
+            ) for column in neighbours if scores[column] > 0
+        ]
+        objs.extend(trim_neighbours(recipe, {
+            int(recipe_ids[column]): float(scores[column])
+            for column in np.flatnonzero(scores > 0)
+        }, top))
+        SimilarRecipe.objects.bulk_create(
+            objs, batch_size=constants.SIMILARITY_CHUNK_SIZE
+        )
@@ -0,0 +1,12 @@
+from django.db import transaction
+
+from core.tasks import task
+
+from .nutrition import refresh_ingredient_nutrition
+
+
+@task
+def refresh_nutrients(ingredient_ids):
+    """Пересчитывает пищевую ценность рецептов с ингредиентами."""
+    with transaction.atomic():
+        refresh_ingredient_nutrition(ingredient_ids)
@@ -2,6 +2,9 @@ from django.contrib import admin
 from django.contrib.auth.models import Group
 from rest_framework.authtoken.models import TokenProxy
 
+from core.admin import DeferredDeletionMixin
+from core.paginators import EstimatedCountPaginator
+
 from .models import CustomUser, Subscribe
 
 
@@ -11,18 +14,26 @@ class SubscribeAdmin(admin.ModelAdmin):
         'user',
         'author'
     )
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(CustomUser)
-class CustomUserAdmin(admin.ModelAdmin):
+class CustomUserAdmin(DeferredDeletionMixin, admin.ModelAdmin):
     list_display = (
         'username',
-        'email'
+        'email',
+        'is_active'
     )
-    list_filter = (
+    list_filter = ('is_active',)
+    search_fields = (
         'username',
         'email'
     )
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.unregister(Group)
@@ -24,6 +24,19 @@ class CustomUser(AbstractUser):
     )
     first_name = models.CharField('Имя', max_length=NAME_LEN)
     last_name = models.CharField('Фамилия', max_length=NAME_LEN)
+    cart_version = models.PositiveIntegerField(
+        'Версия списка покупок', default=0, editable=False
+    )
+
+    def save(self, *args, **kwargs):
+        # cart_version меняется только через UPDATE с F(), поэтому
+        # сохранение ранее загруженного объекта его не перезаписывает.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'cart_version'
+            ]
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.username[:SLICE_LEN]